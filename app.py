@@ -6,6 +6,7 @@ from datetime import datetime
 import time
 from dotenv import load_dotenv
 import re
+from collections import Counter
 from typing import Dict, List, Tuple
 
 # Load environment variables
@@ -18,6 +19,27 @@ st.set_page_config(
     layout="wide"
 )
 
+# Transcript keyword groups checked by the quality score; all groups are tallied in a single regex pass
+_KEYWORD_GROUPS = {
+    "escalation": ('escalate', 'supervisor', 'manager', 'complaint'),
+    "procedure": ('procedure', 'failed'),
+    "empathy": ('understand', 'sorry', 'apologize', 'help'),
+    "frustration": ('frustrated', 'angry', 'upset', 'annoyed'),
+}
+_KEYWORD_GROUP_OF = {keyword: group for group, keywords in _KEYWORD_GROUPS.items() for keyword in keywords}
+_KEYWORD_RE = re.compile("|".join(sorted(_KEYWORD_GROUP_OF, key=len, reverse=True)))
+
+# Lowercased sentiment labels, built once instead of per sentiment result
+_NEGATIVE_LABELS = frozenset(('negative', 'neg', 'negative_sentiment'))
+_SENTIMENT_SCORES = {
+    'positive': 4.5,
+    'neutral': 3.0,
+    'negative': 1.5,
+    'pos': 4.5,
+    'neu': 3.0,
+    'neg': 1.5
+}
+
 class CallAnalyzer:
     def __init__(self, api_key: str):
         """Initialize the CallAnalyzer with AssemblyAI API key."""
@@ -62,7 +84,7 @@ class CallAnalyzer:
                     sentiment_value = result.label
                 
                 # Check for negative sentiment
-                if sentiment_value and sentiment_value.lower() in ['negative', 'neg', 'negative_sentiment']:
+                if sentiment_value and sentiment_value.lower() in _NEGATIVE_LABELS:
                     negative_sentiment_count += 1
         except Exception as e:
             print(f"Debug: Error processing sentiment: {e}")
@@ -76,26 +98,23 @@ class CallAnalyzer:
                 base_score -= 20
                 issues.append("High negative sentiment detected")
         
-        # Analyze transcript text for common service issues
+        # Analyze transcript text for common service issues (one scan counts every keyword group)
         text = transcript.text.lower()
+        keyword_hits = Counter(_KEYWORD_GROUP_OF[keyword] for keyword in _KEYWORD_RE.findall(text))
         
         # Check for escalation issues
-        escalation_keywords = ['escalate', 'supervisor', 'manager', 'complaint']
-        if any(keyword in text for keyword in escalation_keywords):
-            if 'procedure' in text or 'failed' in text:
+        if keyword_hits["escalation"]:
+            if keyword_hits["procedure"]:
                 base_score -= 15
                 issues.append("Agent failed to follow escalation procedure")
         
         # Check for empathy and professionalism
-        empathy_keywords = ['understand', 'sorry', 'apologize', 'help']
-        empathy_count = sum(text.count(keyword) for keyword in empathy_keywords)
-        if empathy_count < 2:
+        if keyword_hits["empathy"] < 2:
             base_score -= 10
             issues.append("Lack of empathy in customer interaction")
         
         # Check for frustration indicators
-        frustration_keywords = ['frustrated', 'angry', 'upset', 'annoyed']
-        if any(keyword in text for keyword in frustration_keywords):
+        if keyword_hits["frustration"]:
             base_score -= 10
             issues.append("Customer became increasingly frustrated")
         
@@ -112,15 +131,6 @@ class CallAnalyzer:
         if not sentiment_analysis_results:
             return 3.0
         
-        sentiment_scores = {
-            'positive': 4.5,
-            'neutral': 3.0,
-            'negative': 1.5,
-            'pos': 4.5,
-            'neu': 3.0,
-            'neg': 1.5
-        }
-        
         total_score = 0
         valid_results = 0
         
@@ -136,7 +146,7 @@ class CallAnalyzer:
                     sentiment_value = result.label
                 
                 if sentiment_value:
-                    score = sentiment_scores.get(sentiment_value.lower(), 3.0)
+                    score = _SENTIMENT_SCORES.get(sentiment_value.lower(), 3.0)
                     total_score += score
                     valid_results += 1
             except Exception:
@@ -165,7 +175,8 @@ class CallAnalyzer:
         
         return agent_name, customer_name
     
-    def analyze_call(self, audio_file_path: str, agent_name: str = None, customer_name: str = None) -> Dict:
+    def analyze_call(self, audio_file_path: str, agent_name: str = None, customer_name: str = None,
+                     recorded_at: datetime = None) -> Dict:
         """Perform complete call analysis."""
         # Transcribe audio
         transcript = self.transcribe_audio(audio_file_path)
@@ -198,16 +209,17 @@ class CallAnalyzer:
             duration_formatted = "0:00"
             duration_ms = 0
         
-        # Get file timestamp for date/time
+        # Get file timestamp for date/time (callers that just wrote the file pass it in and skip the stat)
         try:
-            file_timestamp = os.path.getmtime(audio_file_path)
-            file_datetime = datetime.fromtimestamp(file_timestamp)
+            file_datetime = recorded_at or datetime.fromtimestamp(os.path.getmtime(audio_file_path))
             call_date = file_datetime.strftime("%Y-%m-%d")
             call_time = file_datetime.strftime("%H:%M")
         except Exception as e:
             print(f"Debug: Error getting file timestamp: {e}")
-            call_date = datetime.now().strftime("%Y-%m-%d")
-            call_time = datetime.now().strftime("%H:%M")
+            # One clock read so date and time can't straddle midnight
+            now = datetime.now()
+            call_date = now.strftime("%Y-%m-%d")
+            call_time = now.strftime("%H:%M")
         
         # Create comprehensive analysis result
         analysis_result = {
@@ -345,8 +357,10 @@ def main():
     if uploaded_file is not None:
         # Save uploaded file temporarily
         temp_file_path = f"temp_{uploaded_file.name}"
-        with open(temp_file_path, "wb") as f:
-            f.write(uploaded_file.read())
+        with open(temp_file_path, "wb", buffering=1 << 18) as f:
+            # getbuffer() exposes the uploaded bytes without materializing a second copy via read()
+            f.write(uploaded_file.getbuffer())
+        recorded_at = datetime.now()
         
         try:
             # Initialize analyzer
@@ -367,7 +381,7 @@ def main():
                 progress_bar.progress(75)
                 
                 # Perform analysis
-                analysis_result = analyzer.analyze_call(temp_file_path, agent_name, customer_name)
+                analysis_result = analyzer.analyze_call(temp_file_path, agent_name, customer_name, recorded_at)
                 
                 progress_bar.progress(100)
                 status_text.text("Analysis complete!")
@@ -490,8 +504,10 @@ def main():
         
         finally:
             # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+            try:
+                os.unlink(temp_file_path)
+            except FileNotFoundError:
+                pass
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
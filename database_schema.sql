@@ -321,6 +321,8 @@ CREATE INDEX idx_customers_organization ON customers(organization_id);
 CREATE INDEX idx_customers_external_id ON customers(external_id);
 CREATE INDEX idx_customers_email ON customers(email);
 CREATE INDEX idx_customers_phone ON customers(phone);
+CREATE UNIQUE INDEX idx_customers_org_external_id ON customers(organization_id, external_id)
+    WHERE external_id IS NOT NULL;
 
 -- Call Records
 CREATE TABLE IF NOT EXISTS calls (
@@ -839,28 +841,10 @@ SELECT
     sa.customer_sentiment,
     
     -- Detailed Scores
-    JSONB_AGG(
-        DISTINCT JSONB_BUILD_OBJECT(
-            'criterion_name', ec.name,
-            'category', ec.category,
-            'points_earned', es.points_earned,
-            'max_points', es.max_points,
-            'percentage', es.percentage_score,
-            'justification', es.justification
-        ) ORDER BY ec.category, ec.name
-    ) FILTER (WHERE es.id IS NOT NULL) AS evaluation_details,
+    scores.evaluation_details,
     
     -- Insights
-    JSONB_AGG(
-        DISTINCT JSONB_BUILD_OBJECT(
-            'type', ai.insight_type,
-            'category', ai.category,
-            'title', ai.title,
-            'description', ai.description,
-            'severity', ai.severity,
-            'suggested_action', ai.suggested_action
-        ) ORDER BY ai.severity DESC, ai.insight_type
-    ) FILTER (WHERE ai.id IS NOT NULL) AS insights,
+    ins.insights,
     
     -- Key Concerns
     cb.key_concerns,
@@ -878,22 +862,37 @@ LEFT JOIN customers cust ON c.customer_id = cust.id
 LEFT JOIN call_analyses ca ON ca.call_id = c.id
 LEFT JOIN customer_behavior cb ON cb.call_id = c.id AND cb.analysis_id = ca.id
 LEFT JOIN sentiment_analyses sa ON sa.call_id = c.id
-LEFT JOIN evaluation_scores es ON es.analysis_id = ca.id
-LEFT JOIN evaluation_criteria ec ON es.criterion_id = ec.id
-LEFT JOIN analysis_insights ai ON ai.analysis_id = ca.id
-WHERE ca.status = 'completed'
-GROUP BY 
-    c.id, c.organization_id, c.call_sid, c.direction, c.call_type, 
-    c.duration_seconds, c.started_at, c.ended_at,
-    a.id, a.agent_code, up.first_name, up.last_name, up.email, t.name, d.name,
-    cust.id, cust.name, cust.phone, cust.email,
-    ca.id, ca.total_points_earned, ca.total_max_points, ca.overall_score,
-    ca.performance_category, ca.summary, ca.analysis_provider, ca.model_version,
-    cb.behavior_type, cb.emotional_state, cb.patience_level, cb.cooperation_level,
-    cb.resolution_satisfaction, cb.interaction_quality_score, cb.needs_followup,
-    cb.followup_reason, cb.key_concerns,
-    sa.overall_sentiment, sa.agent_sentiment, sa.customer_sentiment,
-    ca.created_at, ca.completed_at;
+-- Scores and insights are aggregated per analysis; joining both directly multiplies rows (scores x insights)
+LEFT JOIN LATERAL (
+    SELECT JSONB_AGG(
+        JSONB_BUILD_OBJECT(
+            'criterion_name', ec.name,
+            'category', ec.category,
+            'points_earned', es.points_earned,
+            'max_points', es.max_points,
+            'percentage', es.percentage_score,
+            'justification', es.justification
+        ) ORDER BY ec.category, ec.name
+    ) AS evaluation_details
+    FROM evaluation_scores es
+    LEFT JOIN evaluation_criteria ec ON es.criterion_id = ec.id
+    WHERE es.analysis_id = ca.id
+) scores ON true
+LEFT JOIN LATERAL (
+    SELECT JSONB_AGG(
+        JSONB_BUILD_OBJECT(
+            'type', ai.insight_type,
+            'category', ai.category,
+            'title', ai.title,
+            'description', ai.description,
+            'severity', ai.severity,
+            'suggested_action', ai.suggested_action
+        ) ORDER BY ai.severity DESC, ai.insight_type
+    ) AS insights
+    FROM analysis_insights ai
+    WHERE ai.analysis_id = ca.id
+) ins ON true
+WHERE ca.status = 'completed';
 
 -- =============================================
 -- PART 4: FUNCTIONS AND TRIGGERS
@@ -1224,6 +1223,8 @@ CREATE TABLE IF NOT EXISTS course_assignments (
 CREATE INDEX idx_assignments_agent ON course_assignments(agent_id);
 CREATE INDEX idx_assignments_status ON course_assignments(status);
 CREATE INDEX idx_assignments_due_date ON course_assignments(due_date);
+-- Serves "does this course still have active assignments?" probes and the course_id FK cascade
+CREATE INDEX idx_assignments_course_status ON course_assignments(course_id, status);
 
 -- Course Progress Tracking
 CREATE TABLE IF NOT EXISTS course_progress (
@@ -1646,11 +1647,152 @@ CREATE TABLE IF NOT EXISTS uploaded_files (
 
 CREATE INDEX idx_uploaded_files_userid ON uploaded_files USING btree ("userId");
 CREATE INDEX idx_uploaded_files_status ON uploaded_files USING btree (status);
+-- Per-user listings filtered by status (/api/uploads?status=)
+CREATE INDEX idx_uploaded_files_user_status ON uploaded_files USING btree ("userId", status);
 CREATE INDEX idx_uploaded_files_uploaded_at ON uploaded_files USING btree (uploaded_at);
 CREATE INDEX idx_uploaded_files_agent_name ON uploaded_files USING btree ((agent->>'name'));
 CREATE INDEX idx_uploaded_files_tags ON uploaded_files USING gin (tags);
 CREATE INDEX idx_uploaded_files_transcript_id ON uploaded_files USING btree ((transcription->>'transcriptId'));
 
+-- Search text over file name, agent and tags (backs the ?q= substring filter on /api/uploads).
+-- Fields are newline-separated so a match can't span two of them; the trigram GIN index serves ILIKE '%q%'.
+CREATE OR REPLACE FUNCTION uploaded_files_search_text(p_file JSONB, p_agent JSONB, p_tags TEXT[])
+RETURNS TEXT AS $$
+    SELECT COALESCE(p_file->>'originalName', '') || E'\n' ||
+        COALESCE(p_agent->>'name', '') || E'\n' ||
+        COALESCE(array_to_string(p_tags, E'\n'), '')
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS search_text TEXT
+    GENERATED ALWAYS AS (uploaded_files_search_text(file, agent, tags)) STORED;
+CREATE INDEX idx_uploaded_files_search ON uploaded_files USING gin (search_text gin_trgm_ops);
+
+-- Patch a single segment's speaker in place instead of rewriting the whole transcription JSONB.
+-- Returns NULL when the file is not visible to the caller, false when the index is out of range.
+CREATE OR REPLACE FUNCTION set_segment_speaker(p_file_id TEXT, p_user_id UUID, p_segment_index INTEGER, p_speaker TEXT)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_segment_count INTEGER;
+BEGIN
+    SELECT jsonb_array_length(COALESCE(transcription->'segments', '[]'::jsonb)) INTO v_segment_count
+    FROM uploaded_files
+    WHERE id = p_file_id AND "userId" = p_user_id
+    FOR UPDATE;
+    
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    
+    IF p_segment_index < 0 OR p_segment_index >= v_segment_count THEN
+        RETURN false;
+    END IF;
+    
+    UPDATE uploaded_files
+    SET transcription = jsonb_set(
+        transcription,
+        ARRAY['segments', p_segment_index::TEXT, 'speaker'],
+        to_jsonb(p_speaker)
+    )
+    WHERE id = p_file_id;
+    
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Store a finished transcription by merging into the JSONB columns server-side (no read-modify-write)
+CREATE OR REPLACE FUNCTION complete_uploaded_file(p_file_id TEXT, p_transcription JSONB, p_metrics JSONB, p_file JSONB DEFAULT '{}')
+RETURNS VOID AS $$
+    UPDATE uploaded_files
+    SET status = 'completed',
+        transcription = transcription || p_transcription,
+        metrics = p_metrics,
+        file = file || p_file
+    WHERE id = p_file_id;
+$$ LANGUAGE sql;
+
+-- Delete a caller's file in one statement and hand back its id (no row = not found)
+CREATE OR REPLACE FUNCTION delete_uploaded_file(p_file_id TEXT, p_user_id UUID)
+RETURNS TABLE (id TEXT) AS $$
+    DELETE FROM uploaded_files u
+    WHERE u.id = p_file_id AND u."userId" = p_user_id
+    RETURNING u.id;
+$$ LANGUAGE sql;
+
+-- Bulk metrics write for recompute: p_metrics maps file id -> metrics object
+CREATE OR REPLACE FUNCTION set_uploaded_files_metrics(p_metrics JSONB)
+RETURNS VOID AS $$
+    UPDATE uploaded_files u
+    SET metrics = m.value
+    FROM jsonb_each(p_metrics) m
+    WHERE u.id = m.key;
+$$ LANGUAGE sql;
+
+-- JSONB number (or numeric string) -> NUMERIC; anything else is NULL instead of a cast error
+CREATE OR REPLACE FUNCTION jsonb_to_numeric(p_value JSONB)
+RETURNS NUMERIC AS $$
+    SELECT CASE
+        WHEN jsonb_typeof(p_value) = 'number' THEN (p_value #>> '{}')::NUMERIC
+        WHEN jsonb_typeof(p_value) = 'string' AND (p_value #>> '{}') ~ '^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)\s*$'
+            THEN (p_value #>> '{}')::NUMERIC
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Analytics summary (GET /api/analytics/summary) aggregated in one statement instead of shipping every row
+-- to the API. Averages skip missing/zero values; an agent's score prefers the QA evaluation over metrics.
+CREATE OR REPLACE FUNCTION get_uploads_summary(
+    p_user_id UUID DEFAULT NULL,
+    p_from TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_to TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_agent TEXT DEFAULT NULL
+) RETURNS JSONB AS $$
+    WITH calls AS (
+        SELECT
+            agent->>'name' AS agent_name,
+            NULLIF(jsonb_to_numeric(file->'durationSeconds'), 0) AS duration_seconds,
+            NULLIF(jsonb_to_numeric(metrics->'speakingRateWpm'), 0) AS speaking_rate_wpm,
+            NULLIF(jsonb_to_numeric(metrics->'clarity'), 0) AS clarity,
+            metrics->>'sentimentOverall' AS sentiment,
+            COALESCE(
+                jsonb_to_numeric(transcription->'qa_evaluation'->'qa_evaluation'->'score'),
+                jsonb_to_numeric(transcription->'qa_evaluation'->'overall_score'),
+                jsonb_to_numeric(transcription->'qa_evaluation'->'score'),
+                jsonb_to_numeric(transcription->'qa_evaluation'->'qaEvaluation'->'score'),
+                jsonb_to_numeric(metrics->'overallScore')
+            ) AS score
+        FROM uploaded_files
+        WHERE (p_user_id IS NULL OR "userId" = p_user_id)
+            AND (p_from IS NULL OR "uploadedAt" >= p_from)
+            AND (p_to IS NULL OR "uploadedAt" <= p_to)
+            AND (p_agent IS NULL OR LOWER(agent->>'name') = LOWER(p_agent))
+    ),
+    agents AS (
+        SELECT agent_name, COUNT(*) AS calls, ROUND(SUM(COALESCE(score, 0)) / COUNT(*), 2) AS avg_score
+        FROM calls
+        GROUP BY agent_name
+        ORDER BY calls DESC, avg_score DESC, agent_name
+        LIMIT 10
+    )
+    SELECT JSONB_BUILD_OBJECT(
+        'totalCalls', COUNT(*),
+        'avgDurationSec', COALESCE(ROUND(AVG(duration_seconds), 2), 0),
+        'avgSpeakingRateWpm', COALESCE(ROUND(AVG(speaking_rate_wpm), 2), 0),
+        'avgClarity', COALESCE(ROUND(AVG(clarity), 2), 0),
+        'sentimentDistribution', JSONB_BUILD_OBJECT(
+            'POSITIVE', COUNT(*) FILTER (WHERE sentiment = 'POSITIVE'),
+            'NEUTRAL', COUNT(*) FILTER (WHERE sentiment = 'NEUTRAL'),
+            'NEGATIVE', COUNT(*) FILTER (WHERE sentiment = 'NEGATIVE')
+        ),
+        'topAgents', COALESCE((
+            SELECT JSONB_AGG(
+                JSONB_BUILD_OBJECT('name', agent_name, 'calls', calls, 'avgScore', avg_score)
+                ORDER BY calls DESC, avg_score DESC, agent_name
+            )
+            FROM agents
+        ), '[]'::jsonb)
+    )
+    FROM calls;
+$$ LANGUAGE sql STABLE;
+
 -- =============================================
 -- PART 14: MIGRATION SUPPORT
 -- =============================================
@@ -1706,10 +1848,12 @@ BEGIN
     AND (up.first_name || ' ' || up.last_name) = (v_file_record.agent->>'name')
     LIMIT 1;
     
-    -- Create customer if provided
+    -- Get or create customer in one statement (keyed by the client's customer ID when present)
     IF v_file_record.customer IS NOT NULL THEN
-        INSERT INTO customers (organization_id, name, metadata)
-        VALUES (v_org_id, v_file_record.customer->>'name', v_file_record.customer)
+        INSERT INTO customers (organization_id, external_id, name, metadata)
+        VALUES (v_org_id, v_file_record.customer->>'id', v_file_record.customer->>'name', v_file_record.customer)
+        ON CONFLICT (organization_id, external_id) WHERE external_id IS NOT NULL
+        DO UPDATE SET updated_at = NOW()
         RETURNING id INTO v_customer_id;
     END IF;
     
@@ -1,10 +1,35 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError, jwt
 from supabase_client import get_supabase_client
+from ttl_cache import TTLCache
 from typing import Optional, Dict, Any
+import time
 
 security = HTTPBearer(auto_error=False)
 
+# Verified users keyed by access token, so repeated requests skip the Supabase auth round-trip.
+# Kept short-lived so revoked tokens stop working quickly; entries never outlive the token's exp.
+_user_cache: "TTLCache[Dict[str, Any]]" = TTLCache(ttl_seconds=60.0, maxsize=4096)
+
+
+def _get_cached_user(token: str) -> Optional[Dict[str, Any]]:
+    user = _user_cache.get(token)
+    return dict(user) if user is not None else None
+
+
+def _cache_user(token: str, user: Dict[str, Any]) -> None:
+    # Never outlive the token itself: cap the entry at the JWT's exp claim (already verified by Supabase)
+    ttl = _user_cache.ttl_seconds
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        exp = None
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _user_cache.set(token, dict(user), ttl_seconds=ttl)
+
 
 async def get_current_user(
 	credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
@@ -16,14 +41,19 @@ async def get_current_user(
     if not credentials:
         return None
     
+    cached = _get_cached_user(credentials.credentials)
+    if cached is not None:
+        return cached
+    
     try:
-        supabase = get_supabase_client()
+        supabase = await get_supabase_client()
         # Verify the token with Supabase
-        user = supabase.auth.get_user(credentials.credentials)
+        user = await supabase.auth.get_user(credentials.credentials)
         if user and user.user:
-            user_dict = user.user.dict() if hasattr(user.user, "dict") else dict(user.user)
+            user_dict = user.user.model_dump() if hasattr(user.user, "model_dump") else dict(user.user)
             # attach access token so DB calls can pass RLS
             user_dict["access_token"] = credentials.credentials
+            _cache_user(credentials.credentials, user_dict)
             return user_dict
         return None
     except Exception:
@@ -1,27 +1,36 @@
 from fastapi import FastAPI, File, UploadFile, Form, Depends, HTTPException, Query, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
 import uuid
-import json
 import logging
+import os
+import re
+import shutil
+import tempfile
 
 from config import get_settings
 import httpx
+import orjson
+from postgrest.types import ReturnMethod
 from models import (
     CallData, UploadResponse, TranscriptionStatus, ErrorResponse,
-    SpeakerCorrectionRequest, AnalyticsSummary, ContactSubmission,
-    UploadMetadata, Agent, Transcription, Metrics, FileMetadata
+    SpeakerCorrectionRequest, BulkRecomputeRequest, AnalyticsSummary, ContactSubmission,
+    UploadMetadata, UrlUploadRequest, Agent, Transcription, Metrics, FileMetadata
 )
 from auth import get_current_user, require_auth
 from supabase_client import get_supabase_client
-from services.assemblyai_service import AssemblyAIService
+from ttl_cache import TTLCache
+from services.assemblyai_service import AssemblyAIService, UPLOAD_CHUNK_SIZE
 from services.openai_service import OpenAIService
 from services.analytics_service import AnalyticsService
 
 settings = get_settings()
-app = FastAPI(title=settings.app_name)
+# orjson serializes the large call/transcription payloads much faster than stdlib json
+app = FastAPI(title=settings.app_name, default_response_class=ORJSONResponse)
 
 # Configure application logging
 logging.basicConfig(
@@ -53,7 +62,71 @@ app.add_middleware(
 # Initialize services
 assemblyai_service = AssemblyAIService()
 openai_service = OpenAIService()
-analytics_service = AnalyticsService()
+analytics_service = AnalyticsService(openai_service)
+# Shared pool for direct REST calls (contact form -> PostgREST)
+http_client = httpx.AsyncClient()
+
+
+# Columns backing the CallData response model; read queries skip the legacy flat columns
+_CALL_DATA_COLUMNS = "id,uploadedAt,agent,customer,file,tags,status,transcription,metrics,debug"
+
+_RESOLVED_SPEAKERS = frozenset(("Agent", "Customer"))
+
+# Single-letter diarization labels: "a", "speakera", "speaker a", "speaker 1 b"...; captures the letter.
+# After "speaker " the letter must be its own space-separated word ("speaker id" / "speaker 1b" don't match).
+_SPEAKER_LETTER_RE = re.compile(r"(?:speaker(?: (?:.* )?)?)?([a-d])")
+
+# Analytics summaries keyed by (user id, from, to, agent). Dashboards poll the summary and every miss
+# re-reads and re-aggregates all of the user's calls; writes that change the numbers drop the user's entries.
+_summary_cache: "TTLCache[AnalyticsSummary]" = TTLCache(ttl_seconds=30.0, maxsize=1024)
+
+
+def _invalidate_summaries(user_id: Optional[str]) -> None:
+    # Unauthenticated summaries (user None) span every user's calls, so they are always dropped
+    _summary_cache.discard_where(lambda k: k[0] is None or k[0] == user_id)
+
+
+# Call listings keyed by (user id, q, agent, status, limit, offset). The uploads page polls the list while
+# transcriptions run; the short TTL bounds staleness for background status changes that carry no user id.
+_uploads_cache: "TTLCache[List[Dict[str, Any]]]" = TTLCache(ttl_seconds=5.0, maxsize=1024)
+
+
+def _invalidate_uploads(user_id: Optional[str]) -> None:
+    _uploads_cache.discard_where(lambda k: k[0] is None or k[0] == user_id)
+
+
+def _invalidate_call_caches(user_id: Optional[str]) -> None:
+    """Drop cached listings and summaries after a write to one of the user's calls"""
+    _invalidate_uploads(user_id)
+    _invalidate_summaries(user_id)
+
+
+async def _execute_then_invalidate(builder: Any, user_id: Optional[str]) -> None:
+    """Background write: run the prepared query, then drop the user's cached reads.
+
+    Invalidating only after the write lands keeps a read in between from re-caching stale rows.
+    """
+    await builder.execute()
+    _invalidate_call_caches(user_id)
+
+
+def _escape_like(value: str) -> str:
+    value = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    # PostgREST rewrites every * in a like/ilike value to % (a backslash doesn't stop it), so a
+    # literal * becomes the single-character wildcard instead: it still matches itself, never a run
+    return value.replace("*", "_")
+
+
+def _as_user(builder: Any, current_user: Optional[Dict[str, Any]]) -> Any:
+    """Attach the caller's JWT to one query builder so RLS policies evaluate as the user.
+
+    The token goes on the request's own headers rather than the shared client's session
+    (postgrest.auth()), which concurrent requests would overwrite across awaits.
+    """
+    token = current_user.get("access_token") if current_user else None
+    if token:
+        builder.headers["Authorization"] = f"Bearer {token}"
+    return builder
 
 
 # Utility: Remap transcription segment speakers to Agent/Customer using QA evaluation mapping
@@ -63,6 +136,9 @@ def _remap_segment_speakers(transcription: Dict[str, Any]) -> None:
     segments = transcription.get("segments")
     if not isinstance(segments, list) or not segments:
         return
+    # Fast path: labels were already resolved (e.g. on a previous read); skip the mapping pass
+    if all(not isinstance(seg, dict) or seg.get("speaker") in _RESOLVED_SPEAKERS for seg in segments):
+        return
     qa = transcription.get("qa_evaluation") or {}
     mapping = qa.get("speaker_mapping") or qa.get("speakerMapping") or {}
     if not isinstance(mapping, dict):
@@ -87,27 +163,16 @@ def _remap_segment_speakers(transcription: Dict[str, Any]) -> None:
         s = label.strip().lower()
         if s in ("agent", "customer"):
             return "Agent" if s == "agent" else "Customer"
-        if s in ("a", "speaker a", "speakera"):
-            return norm_map.get("A") or None
-        if s in ("b", "speaker b", "speakerb"):
-            return norm_map.get("B") or None
-        # Heuristics
-        if s.startswith("speaker "):
-            letter = s.split(" ")[-1]
-            if letter in ("a", "b"):
-                return norm_map.get(letter.upper()) or None
+        m = _SPEAKER_LETTER_RE.fullmatch(s)
+        if m and m.group(1) in ("a", "b"):
+            return norm_map.get(m.group(1).upper()) or None
         return None
 
     def is_overlap_label(label: Any) -> bool:
         if not isinstance(label, str):
             return False
-        s = label.strip().lower()
-        if s in ("c", "d", "speaker c", "speaker d", "speakerc", "speakerd"):
-            return True
-        if s.startswith("speaker "):
-            letter = s.split(" ")[-1]
-            return letter in ("c", "d")
-        return False
+        m = _SPEAKER_LETTER_RE.fullmatch(label.strip().lower())
+        return bool(m) and m.group(1) in ("c", "d")
 
     def find_next_definitive_role(start_index: int) -> str | None:
         # look ahead for the next segment that maps cleanly to Agent/Customer via A/B or explicit
@@ -144,54 +209,100 @@ def _remap_segment_speakers(transcription: Dict[str, Any]) -> None:
                     pass
 
 
+# Places the QA evaluation has stored the overall score, in lookup order
+_QA_SCORE_PATHS = (("qa_evaluation", "score"), ("overall_score",), ("score",), ("qaEvaluation", "score"))
+
+
+def _qa_overall_score(qa: Dict[str, Any]) -> Any:
+    for path in _QA_SCORE_PATHS:
+        value = qa
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            return value
+    return None
+
+
+def _normalize_call_data(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill the fields CallData requires on a stored row; provider falls back to the model default"""
+    t = c.get("transcription") or {}
+    t.setdefault("text", "")
+    c["transcription"] = t
+    # Normalize speakers to Agent/Customer using qa_evaluation mapping
+    _remap_segment_speakers(t)
+    m = c.get("metrics")
+    if not isinstance(m, dict):
+        m = c["metrics"] = m or {}
+    # Backfill overallScore from QA evaluation if missing; mirror snake_case for consistency
+    if m.get("overallScore") is None and m.get("overall_score") is None:
+        qa = t.get("qa_evaluation")
+        score = _qa_overall_score(qa) if isinstance(qa, dict) else None
+        if score is not None:
+            m.setdefault("overallScore", score)
+            m.setdefault("overall_score", score)
+    return c
+
+
 @app.on_event("startup")
 async def on_startup():
+	# Warm the shared client; endpoints also create it lazily if this hook never runs
+	await get_supabase_client()
 	logger.info("Application startup")
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
+	await assemblyai_service.aclose()
+	await openai_service.aclose()
+	await http_client.aclose()
 	logger.info("Application shutdown")
 
 
 # Health & Diagnostics endpoints
 @app.get("/api/health")
 async def health_check():
-    return {"status": "ok", "time": datetime.utcnow().isoformat()}
+    return {"status": "ok", "time": datetime.now(timezone.utc)}
 
 
 @app.get("/api/debug/db-status")
 async def debug_db_status():
     """Get database status for debugging"""
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     
     try:
-        # Get file count
-        result = supabase.table("uploaded_files").select("*", count="exact").execute()
-        file_count = result.count if hasattr(result, 'count') else len(result.data)
+        # Get file count; the count comes from the Content-Range header, so don't pull the rows themselves
+        result = await supabase.table("uploaded_files").select("id", count="exact").limit(1).execute()
+        file_count = result.count if result.count is not None else len(result.data)
         
         # Get last file
-        last_file_result = supabase.table("uploaded_files")\
-            .select("*")\
-            .order("uploaded_at", desc=True)\
-            .limit(1)\
+        last_file_result = await (
+            supabase.table("uploaded_files")
+            .select("*")
+            .order("uploaded_at", desc=True)
+            .limit(1)
             .execute()
+        )
         
         last_file = last_file_result.data[0] if last_file_result.data else None
         
         return {
             "fileCount": file_count,
             "lastFile": last_file,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Upload & Transcription endpoints
-async def process_transcription(file_id: str, audio_url: str):
-    """Background task to process transcription"""
-    supabase = get_supabase_client()
+async def process_transcription(file_id: str, audio_url: str, extra_fields: Optional[Dict[str, Any]] = None):
+    """Background task to process transcription
+
+    extra_fields are written in the same UPDATE as the status change, so callers
+    with pending column changes don't need a separate round trip.
+    """
+    supabase = await get_supabase_client()
+    extra_fields = extra_fields or {}
     
     try:
         # Start transcription with AssemblyAI
@@ -199,87 +310,67 @@ async def process_transcription(file_id: str, audio_url: str):
         transcript_id = await assemblyai_service.start_transcription(audio_url, webhook_url)
         
         # Update status and transcript ID
-        supabase.table("uploaded_files").update({
+        await supabase.table("uploaded_files").update({
+            **extra_fields,
             "status": TranscriptionStatus.PROCESSING.value,
             "transcription": {
                 "provider": "assemblyai",
                 "transcriptId": transcript_id,
                 "text": ""
             }
-        }).eq("id", file_id).execute()
+        }, returning=ReturnMethod.minimal).eq("id", file_id).execute()
         
     except Exception as e:
         # Update status to error
-        supabase.table("uploaded_files").update({
+        await supabase.table("uploaded_files").update({
+            **extra_fields,
             "status": TranscriptionStatus.ERROR.value,
             "error": str(e)
-        }).eq("id", file_id).execute()
+        }, returning=ReturnMethod.minimal).eq("id", file_id).execute()
 
 
-@app.post("/api/upload", response_model=UploadResponse)
-async def upload_file(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    metadata: Optional[str] = Form(None),
-    current_user: Dict[str, Any] = Depends(require_auth)
-):
-    """Upload audio file and start transcription"""
-    
-    # Validate file type
-    if file.content_type not in settings.allowed_audio_formats:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(settings.allowed_audio_formats)}"
-        )
-    
-    # Validate file size
-    file_content = await file.read()
-    if len(file_content) > settings.max_file_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {settings.max_file_size / (1024**3):.1f}GB"
-        )
-    
-    # Parse metadata
+async def _insert_upload_record(
+    file_id: str,
+    original_name: str,
+    mime_type: str,
+    size: int,
+    audio_url: str,
+    metadata: Optional[str],
+    current_user: Dict[str, Any],
+) -> None:
+    """Build the uploaded_files row for a newly registered call and insert it"""
+    # Parse metadata once; reuse it for the model and the normalized legacy text column
     upload_metadata = None
+    metadata_text = None
     if metadata:
         try:
-            metadata_dict = json.loads(metadata)
+            metadata_dict = orjson.loads(metadata)
+            metadata_text = orjson.dumps(metadata_dict).decode()
+        except orjson.JSONDecodeError:
+            metadata_dict = None
+            metadata_text = metadata  # fall back to raw
+        try:
             upload_metadata = UploadMetadata(**metadata_dict)
         except Exception:
             pass  # Ignore invalid metadata
     
-    # Generate file ID
-    file_id = str(uuid.uuid4())
-    
-    # Upload file to AssemblyAI
-    try:
-        audio_url = await assemblyai_service.upload_file(file_content)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
-    
     # Prepare initial data
-    agent_data = upload_metadata.agent.dict() if upload_metadata and upload_metadata.agent else {"name": "Unknown Agent"}
+    agent_data = upload_metadata.agent.model_dump() if upload_metadata and upload_metadata.agent else {"name": "Unknown Agent"}
     # Derive legacy columns to satisfy existing schema
-    ext = file.filename.rsplit('.', 1)[-1] if '.' in file.filename else ''
+    ext = original_name.rsplit('.', 1)[-1] if '.' in original_name else ''
     derived_file_name = f"{file_id}.{ext}" if ext else file_id
-    metadata_text = None
-    if metadata:
-        try:
-            metadata_text = json.dumps(json.loads(metadata))
-        except Exception:
-            metadata_text = metadata  # fall back to raw
     
+    uploaded_at = datetime.now(timezone.utc).isoformat()
     initial_data = {
         "id": file_id,
         # store both name styles for compatibility with existing schema
-        "uploadedAt": datetime.utcnow().isoformat(),
-        "uploaded_at": datetime.utcnow().isoformat(),
+        "uploadedAt": uploaded_at,
+        "uploaded_at": uploaded_at,
         "agent": agent_data,
         "file": {
-            "originalName": file.filename,
-            "size": len(file_content),
-            "mimeType": file.content_type
+            "originalName": original_name,
+            "size": size,
+            "mimeType": mime_type
         },
         "tags": (upload_metadata.tags or []) if upload_metadata else [],
         "status": TranscriptionStatus.QUEUED.value,
@@ -294,24 +385,115 @@ async def upload_file(
         "user_id": current_user["id"] if current_user else None,
         "userId": current_user["id"] if current_user else None,
         # legacy flat columns for existing schema
-        "original_name": file.filename,
+        "original_name": original_name,
         "file_name": derived_file_name,
-        "size": len(file_content),
-        "mime_type": file.content_type,
-        # store AssemblyAI upload URL in legacy text column
+        "size": size,
+        "mime_type": mime_type,
+        # store the audio URL handed to AssemblyAI in legacy text column
         "file_data": audio_url,
         "metadata": metadata_text,
     }
     
     # Store in database
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     # Pass user's JWT so RLS policies evaluate as the user
-    if current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])
-    supabase.table("uploaded_files").insert(initial_data).execute()
+    await _as_user(supabase.table("uploaded_files").insert(initial_data), current_user).execute()
+
+
+def _validate_audio_format(mime_type: Optional[str]) -> None:
+    if mime_type not in settings.allowed_audio_formats:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(settings.allowed_audio_formats)}"
+        )
+
+
+def _spool_to_tempfile(src: Any, suffix: str = "") -> str:
+    """Copy an uploaded file object to a temp file owned by us and return its path"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as dst:
+        try:
+            shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            # delete=False: a partial spool would otherwise stay on disk
+            os.unlink(dst.name)
+            raise
+        return dst.name
+
+
+async def ingest_upload(file_id: str, tmp_path: str):
+    """Background task: push the spooled audio to AssemblyAI, then start transcription"""
+    supabase = await get_supabase_client()
     
-    # Start transcription in background
-    background_tasks.add_task(process_transcription, file_id, audio_url)
+    try:
+        audio_url = await assemblyai_service.upload_path(tmp_path)
+    except Exception as e:
+        await supabase.table("uploaded_files").update({
+            "status": TranscriptionStatus.ERROR.value,
+            "error": f"Failed to upload file: {str(e)}"
+        }, returning=ReturnMethod.minimal).eq("id", file_id).execute()
+        return
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+    
+    # Record the AssemblyAI upload URL in the legacy text column with the status update
+    await process_transcription(file_id, audio_url, {"file_data": audio_url})
+
+
+@app.post("/api/upload", response_model=UploadResponse)
+async def upload_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    metadata: Optional[str] = Form(None),
+    current_user: Dict[str, Any] = Depends(require_auth)
+):
+    """Upload audio file and start transcription"""
+    
+    # Validate file type
+    _validate_audio_format(file.content_type)
+    
+    # Validate file size from the parsed multipart part; the body itself is spooled, not held in memory
+    file_size = file.size or 0
+    if file_size > settings.max_file_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {settings.max_file_size / (1024**3):.1f}GB"
+        )
+    
+    # Generate file ID
+    file_id = str(uuid.uuid4())
+    
+    # Hand the audio off to a temp file we own: the UploadFile is closed once the response is sent,
+    # and the (potentially slow) push to AssemblyAI happens after we respond.
+    # The spool (disk, in the threadpool) and the row insert don't depend on each other, so both run at once;
+    # file_data (the AssemblyAI URL) is filled in by the background ingest.
+    ext = os.path.splitext(file.filename or "")[1]
+    spool_result, insert_result = await asyncio.gather(
+        run_in_threadpool(_spool_to_tempfile, file.file, ext),
+        _insert_upload_record(
+            file_id, file.filename, file.content_type, file_size, "", metadata, current_user
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(insert_result, BaseException):
+        if not isinstance(spool_result, BaseException):
+            os.unlink(spool_result)
+        raise insert_result
+    if isinstance(spool_result, BaseException):
+        # No audio to transcribe: drop the row that was registered alongside
+        supabase = await get_supabase_client()
+        await _as_user(
+            supabase.table("uploaded_files").delete(returning=ReturnMethod.minimal).eq("id", file_id),
+            current_user,
+        ).execute()
+        raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(spool_result)}")
+    tmp_path = spool_result
+    _invalidate_call_caches(current_user["id"])
+    
+    # Upload to AssemblyAI and start transcription in background
+    background_tasks.add_task(ingest_upload, file_id, tmp_path)
     
     return UploadResponse(
         success=True,
@@ -320,6 +502,40 @@ async def upload_file(
     )
 
 
+@app.post("/api/upload/url", response_model=UploadResponse)
+async def upload_from_url(
+    request: UrlUploadRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Dict[str, Any] = Depends(require_auth)
+):
+    """Register a call whose audio is already hosted (e.g. object storage) and start transcription.
+
+    The API never receives the audio bytes: AssemblyAI fetches them from audio_url directly.
+    """
+    _validate_audio_format(request.mime_type)
+    if request.size > settings.max_file_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {settings.max_file_size / (1024**3):.1f}GB"
+        )
+    
+    file_id = str(uuid.uuid4())
+    await _insert_upload_record(
+        file_id, request.original_name, request.mime_type, request.size,
+        request.audio_url, request.metadata, current_user
+    )
+    _invalidate_call_caches(current_user["id"])
+    
+    # Start transcription in background
+    background_tasks.add_task(process_transcription, file_id, request.audio_url)
+    
+    return UploadResponse(
+        success=True,
+        file_id=file_id,
+        message="Audio registered successfully. Transcription started."
+    )
+
+
 @app.get("/api/uploads", response_model=List[CallData])
 async def list_uploads(
     q: Optional[str] = Query(None),
@@ -330,16 +546,26 @@ async def list_uploads(
     current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
 ):
     """List uploaded calls with filtering"""
-    supabase = get_supabase_client()
+    cache_key = (current_user["id"] if current_user else None, q, agent, status, limit, offset)
+    cached = _uploads_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    supabase = await get_supabase_client()
     
     # Build query
-    query = supabase.table("uploaded_files").select("*")
-    if current_user and current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
+    query = _as_user(supabase.table("uploaded_files").select(_CALL_DATA_COLUMNS), current_user)  # RLS as user
     
     # Apply filters
     if status:
         query = query.eq("status", status.value)
+    if q:
+        # Case-insensitive substring match on file name, agent or tags, served by a trigram GIN index;
+        # searching before pagination keeps pages full
+        query = query.ilike("search_text", f"%{_escape_like(q)}%")
+    if agent:
+        # Case-insensitive exact match on the agent name; LIKE metacharacters in the name are escaped
+        query = query.ilike("agent->>name", _escape_like(agent))
     
     # Apply user filter if authenticated
     if current_user:
@@ -349,61 +575,13 @@ async def list_uploads(
     query = query.range(offset, offset + limit - 1)
     
     # Execute query
-    result = query.execute()
+    result = await query.execute()
     
-    # Apply additional filters in memory (for complex searches)
     calls = result.data
-    # Ensure required transcription shape
     for c in calls:
-        t = c.get("transcription") or {}
-        if "text" not in t:
-            t["text"] = ""
-        if "provider" not in t:
-            t["provider"] = "assemblyai"
-        c["transcription"] = t
-        # Normalize speakers to Agent/Customer using qa_evaluation mapping
-        _remap_segment_speakers(c["transcription"])
-        # Ensure metrics exists
-        if not isinstance(c.get("metrics"), dict):
-            c["metrics"] = c.get("metrics") or {}
-        m = c["metrics"]
-        # Backfill overallScore from QA evaluation if missing
-        overall_score_present = (
-            ("overallScore" in m and m.get("overallScore") is not None)
-            or ("overall_score" in m and m.get("overall_score") is not None)
-        )
-        if not overall_score_present:
-            qa = (t.get("qa_evaluation") or {}) if isinstance(t.get("qa_evaluation"), dict) else {}
-            score = None
-            # Try common locations
-            if isinstance(qa, dict):
-                score = (
-                    qa.get("qa_evaluation", {}).get("score")
-                    if isinstance(qa.get("qa_evaluation"), dict) else None
-                )
-                if score is None:
-                    score = qa.get("overall_score")
-                if score is None:
-                    score = qa.get("score")
-                if score is None and isinstance(qa.get("qaEvaluation"), dict):
-                    score = qa.get("qaEvaluation", {}).get("score")
-            # Set camelCase for API consumers; also mirror snake_case for consistency
-            if score is not None:
-                m.setdefault("overallScore", score)
-                m.setdefault("overall_score", score)
-    
-    if agent:
-        calls = [c for c in calls if c.get("agent", {}).get("name", "").lower() == agent.lower()]
-    
-    if q:
-        q_lower = q.lower()
-        calls = [
-            c for c in calls
-            if q_lower in c.get("file", {}).get("originalName", "").lower()
-            or q_lower in c.get("agent", {}).get("name", "").lower()
-            or any(q_lower in tag.lower() for tag in c.get("tags", []))
-        ]
+        _normalize_call_data(c)
     
+    _uploads_cache.set(cache_key, calls)
     return calls
 
 
@@ -413,30 +591,19 @@ async def get_upload(
     current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
 ):
     """Get a single call with full metadata"""
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     
-    if current_user and current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
-    query = supabase.table("uploaded_files").select("*").eq("id", file_id)
+    query = _as_user(supabase.table("uploaded_files").select(_CALL_DATA_COLUMNS), current_user).eq("id", file_id)
     
     # Apply user filter if authenticated
     if current_user:
         query = query.eq("userId", current_user["id"])
     
-    result = query.execute()
+    result = await query.execute()
     
     if not result.data:
         raise HTTPException(status_code=404, detail="File not found")
-    item = result.data[0]
-    t = item.get("transcription") or {}
-    if "text" not in t:
-        t["text"] = ""
-    if "provider" not in t:
-        t["provider"] = "assemblyai"
-    item["transcription"] = t
-    # Normalize speakers to Agent/Customer using qa_evaluation mapping
-    _remap_segment_speakers(item["transcription"])
-    return item
+    return _normalize_call_data(result.data[0])
 
 
 @app.delete("/api/uploads/{file_id}")
@@ -445,23 +612,17 @@ async def delete_upload(
     current_user: Dict[str, Any] = Depends(require_auth)
 ):
     """Delete a call and its artifacts"""
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     
-    # RLS as current user
-    if current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
-    # Check if file exists and belongs to user
-    result = supabase.table("uploaded_files")\
-        .select("*")\
-        .eq("id", file_id)\
-        .eq("userId", current_user["id"])\
-        .execute()
+    # Ownership check and delete in one statement (RLS as current user); an empty result means no such file
+    result = await _as_user(supabase.rpc("delete_uploaded_file", {
+        "p_file_id": file_id,
+        "p_user_id": current_user["id"],
+    }), current_user).execute()
     
     if not result.data:
         raise HTTPException(status_code=404, detail="File not found")
-    
-    # Delete file
-    supabase.table("uploaded_files").delete().eq("id", file_id).execute()
+    _invalidate_call_caches(current_user["id"])
     
     return {"success": True}
 
@@ -472,16 +633,17 @@ async def get_transcription_status(
     current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
 ):
     """Get transcription status and partial results"""
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     
-    if current_user and current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
-    query = supabase.table("uploaded_files").select("*").eq("id", file_id)
+    # Polled frequently: fetch only the columns this endpoint reads (RLS as user)
+    query = _as_user(
+        supabase.table("uploaded_files").select("status,error,transcription,file"), current_user
+    ).eq("id", file_id)
     
     if current_user:
         query = query.eq("userId", current_user["id"])
     
-    result = query.execute()
+    result = await query.execute()
     
     if not result.data:
         raise HTTPException(status_code=404, detail="File not found")
@@ -495,10 +657,17 @@ async def get_transcription_status(
         "error": file_data.get("error")
     }
     
-    # Check with AssemblyAI for live status and, if completed, hydrate DB (fallback when webhook isn't configured)
+    # Check with AssemblyAI for live status and, if completed, hydrate DB (fallback when webhook isn't configured).
+    # A completed transcription already persisted with its text is final, so polls are served from the DB row.
     transcript_id = file_data.get("transcription", {}).get("transcriptId")
-    if transcript_id:
-        aai_status = await assemblyai_service.get_transcription_status(transcript_id)
+    already_hydrated = (
+        status == TranscriptionStatus.COMPLETED.value
+        and bool((file_data.get("transcription") or {}).get("text"))
+    )
+    if transcript_id and not already_hydrated:
+        # One GET returns both the job status and, once completed, the full result
+        transcript_payload = await assemblyai_service.get_transcript(transcript_id)
+        aai_status = assemblyai_service.status_from_payload(transcript_payload)
         response["status"] = aai_status["status"]
         if aai_status.get("error"):
             response["error"] = aai_status["error"]
@@ -507,7 +676,7 @@ async def get_transcription_status(
         if aai_status["status"] == TranscriptionStatus.COMPLETED.value:
             db_transcription = file_data.get("transcription", {}) or {}
             if not db_transcription.get("text"):
-                transcription_result = await assemblyai_service.get_transcription_result(transcript_id)
+                transcription_result = assemblyai_service.parse_transcription_result(transcript_payload)
                 if transcription_result and transcription_result.get("text"):
                     # Summary is now provided by AssemblyAI (summarization=True)
                     metrics = await analytics_service.compute_metrics(
@@ -519,32 +688,25 @@ async def get_transcription_status(
                     try:
                         qa_eval = await openai_service.evaluate_call_quality_openai(
                             transcript=transcription_result.get("text", ""),
-                            metrics=metrics.dict() if hasattr(metrics, "dict") else metrics,
+                            metrics=metrics.model_dump() if hasattr(metrics, "model_dump") else metrics,
                             utterances=transcription_result.get("segments") or [],
                         )
                         transcription_result["qa_evaluation"] = qa_eval
                     except Exception as e:
                         transcription_result["qa_evaluation_error"] = str(e)
 
-                    # Update DB with full results
-                    update_payload = {
-                        "status": TranscriptionStatus.COMPLETED.value,
-                        "transcription": {
-                            **db_transcription,
-                            **transcription_result,
-                        },
-                        "metrics": metrics.dict(),
-                    }
+                    # Update DB with full results; the JSONB merge happens in SQL.
+                    # Inline (not deferred) so the next poll already sees the text and skips this work.
                     # set durationSeconds if available
                     duration_seconds = transcription_result.get("duration_seconds")
-                    if duration_seconds is not None:
-                        update_payload["file"] = {
-                            **(file_data.get("file", {}) or {}),
-                            "durationSeconds": duration_seconds,
-                        }
-
-                    supabase.table("uploaded_files").update(update_payload).eq("id", file_id).execute()
-                    response["transcription"] = update_payload["transcription"]
+                    await _as_user(supabase.rpc("complete_uploaded_file", {
+                        "p_file_id": file_id,
+                        "p_transcription": transcription_result,
+                        "p_metrics": metrics.model_dump(),
+                        "p_file": {"durationSeconds": duration_seconds} if duration_seconds is not None else {},
+                    }), current_user).execute()
+                    _invalidate_call_caches(current_user["id"] if current_user else None)
+                    response["transcription"] = {**db_transcription, **transcription_result}
     
     return response
 
@@ -556,58 +718,44 @@ async def update_speaker_labels(
     current_user: Dict[str, Any] = Depends(require_auth)
 ):
     """Update speaker labels for segments"""
-    supabase = get_supabase_client()
-    
-    # RLS as current user
-    if current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
-    # Get file
-    result = supabase.table("uploaded_files")\
-        .select("*")\
-        .eq("id", file_id)\
-        .eq("userId", current_user["id"])\
-        .execute()
-    
-    if not result.data:
+    supabase = await get_supabase_client()
+    
+    # Patch the segment in SQL (jsonb_set) rather than reading and rewriting the whole transcription (RLS as user)
+    result = await _as_user(supabase.rpc("set_segment_speaker", {
+        "p_file_id": file_id,
+        "p_user_id": current_user["id"],
+        "p_segment_index": request.segment_index,
+        "p_speaker": request.new_speaker,
+    }), current_user).execute()
+    
+    # NULL: no such file for this user; false: index out of range
+    if result.data is None:
         raise HTTPException(status_code=404, detail="File not found")
-    
-    file_data = result.data[0]
-    transcription = file_data.get("transcription", {})
-    segments = transcription.get("segments", [])
-    
-    # Update segment
-    if 0 <= request.segment_index < len(segments):
-        segments[request.segment_index]["speaker"] = request.new_speaker
-        
-        # Update in database
-        transcription["segments"] = segments
-        supabase.table("uploaded_files").update({
-            "transcription": transcription
-        }).eq("id", file_id).execute()
-        
-        return {"success": True}
-    else:
+    if not result.data:
         raise HTTPException(status_code=400, detail="Invalid segment index")
+    _invalidate_uploads(current_user["id"])
+    
+    return {"success": True}
 
 
 # Analytics endpoints
 @app.post("/api/analytics/recompute/{file_id}")
 async def recompute_metrics(
     file_id: str,
+    background_tasks: BackgroundTasks,
     current_user: Dict[str, Any] = Depends(require_auth)
 ):
     """Recompute metrics for a file"""
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     
-    # RLS as current user
-    if current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
-    # Get file
-    result = supabase.table("uploaded_files")\
-        .select("*")\
-        .eq("id", file_id)\
-        .eq("userId", current_user["id"])\
-        .execute()
+    # Get file (metrics are derived from the transcription and file metadata only); RLS as current user
+    result = await _as_user(
+        supabase.table("uploaded_files")
+        .select("transcription,file")
+        .eq("id", file_id)
+        .eq("userId", current_user["id"]),
+        current_user,
+    ).execute()
     
     if not result.data:
         raise HTTPException(status_code=404, detail="File not found")
@@ -620,14 +768,62 @@ async def recompute_metrics(
         file_data.get("file", {})
     )
     
-    # Update in database
-    supabase.table("uploaded_files").update({
-        "metrics": metrics.dict()
-    }).eq("id", file_id).execute()
+    # Persist after the response is sent; the caller already has the metrics, so skip echoing the row back.
+    background_tasks.add_task(
+        _execute_then_invalidate,
+        _as_user(supabase.table("uploaded_files").update({
+            "metrics": metrics.model_dump()
+        }, returning=ReturnMethod.minimal).eq("id", file_id), current_user),
+        current_user["id"],
+    )
     
     return {"success": True, "metrics": metrics}
 
 
+@app.post("/api/analytics/recompute")
+async def recompute_metrics_bulk(
+    request: BulkRecomputeRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Dict[str, Any] = Depends(require_auth)
+):
+    """Recompute metrics for several files with one read and one write"""
+    supabase = await get_supabase_client()
+    
+    file_ids = list(dict.fromkeys(request.file_ids))
+    # RLS as current user
+    result = await _as_user(
+        supabase.table("uploaded_files")
+        .select("id,transcription,file")
+        .in_("id", file_ids)
+        .eq("userId", current_user["id"]),
+        current_user,
+    ).execute()
+    
+    if not result.data:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    computed = await asyncio.gather(*(
+        analytics_service.compute_metrics(row.get("transcription", {}), row.get("file", {}))
+        for row in result.data
+    ))
+    metrics_by_id = {row["id"]: metrics for row, metrics in zip(result.data, computed)}
+    
+    # Persist every row in a single statement after the response is sent
+    background_tasks.add_task(
+        _execute_then_invalidate,
+        _as_user(supabase.rpc("set_uploaded_files_metrics", {
+            "p_metrics": {file_id: metrics.model_dump() for file_id, metrics in metrics_by_id.items()},
+        }), current_user),
+        current_user["id"],
+    )
+    
+    return {
+        "success": True,
+        "metrics": metrics_by_id,
+        "missing": [file_id for file_id in file_ids if file_id not in metrics_by_id],
+    }
+
+
 @app.get("/api/analytics/summary", response_model=AnalyticsSummary)
 async def get_analytics_summary(
     from_date: Optional[datetime] = Query(None, alias="from"),
@@ -636,104 +832,98 @@ async def get_analytics_summary(
     current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
 ):
     """Get aggregated analytics"""
-    supabase = get_supabase_client()
-    
-    # Get all relevant calls
-    if current_user and current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])  # RLS as user
-    query = supabase.table("uploaded_files").select("*")
-    
-    if current_user:
-        query = query.eq("userId", current_user["id"])
+    cache_key = (current_user["id"] if current_user else None, from_date, to_date, agent)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    if from_date:
-        query = query.gte("uploadedAt", from_date.isoformat())
+    supabase = await get_supabase_client()
     
-    if to_date:
-        query = query.lte("uploadedAt", to_date.isoformat())
+    # Aggregated in Postgres: one JSON object comes back instead of every matching call (RLS as user)
+    result = await _as_user(supabase.rpc("get_uploads_summary", {
+        "p_user_id": current_user["id"] if current_user else None,
+        "p_from": from_date.isoformat() if from_date else None,
+        "p_to": to_date.isoformat() if to_date else None,
+        "p_agent": agent,
+    }), current_user).execute()
     
-    result = query.execute()
+    summary = AnalyticsSummary(**result.data)
+    _summary_cache.set(cache_key, summary)
+    return summary
+
+
+# Webhook endpoints
+async def finalize_transcription(file_id: str, transcript_id: str, file_data: Dict[str, Any]):
+    """Fetch the finished transcript, compute metrics and QA, and store them (background task)"""
+    supabase = await get_supabase_client()
     
-    # Convert to CallData objects
-    calls = []
-    for data in result.data:
-        try:
-            calls.append(CallData(**data))
-        except Exception:
-            continue  # Skip invalid data
+    transcription_result = await assemblyai_service.get_transcription_result(transcript_id)
+    if not transcription_result:
+        return
     
-    # Calculate aggregated stats
-    stats = await analytics_service.get_aggregated_stats(
-        calls, from_date, to_date, agent
+    # Summary is provided by AssemblyAI (summarization=True)
+    # Compute metrics
+    metrics = await analytics_service.compute_metrics(
+        transcription_result,
+        file_data.get("file", {})
     )
+
+    # OpenAI QA evaluation (o4-mini)
+    try:
+        qa_eval = await openai_service.evaluate_call_quality_openai(
+            transcript=transcription_result.get("text", ""),
+            metrics=metrics.model_dump() if hasattr(metrics, "model_dump") else metrics,
+            utterances=transcription_result.get("segments") or [],
+        )
+        transcription_result["qa_evaluation"] = qa_eval
+    except Exception as e:
+        transcription_result["qa_evaluation_error"] = str(e)
     
-    return AnalyticsSummary(**stats)
+    # Update file with transcription and metrics; the JSONB merge happens in SQL
+    await supabase.rpc("complete_uploaded_file", {
+        "p_file_id": file_id,
+        "p_transcription": transcription_result,
+        "p_metrics": metrics.model_dump(),
+        "p_file": {"durationSeconds": transcription_result.get("duration_seconds")},
+    }).execute()
+    _invalidate_call_caches(file_data.get("userId"))
 
 
-# Webhook endpoints
 @app.post("/api/webhooks/assemblyai")
-async def webhook_assemblyai(payload: Dict[str, Any]):
+async def webhook_assemblyai(payload: Dict[str, Any], background_tasks: BackgroundTasks):
     """Handle AssemblyAI webhook"""
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     
     transcript_id = payload.get("transcript_id")
     if not transcript_id:
         return {"error": "No transcript ID"}
     
+    if payload.get("status") == "error":
+        # Nothing from the stored row is needed: update by transcript ID in a single statement
+        result = await supabase.table("uploaded_files").update({
+            "status": TranscriptionStatus.ERROR.value,
+            "error": payload.get("error", "Transcription failed")
+        }, count="exact", returning=ReturnMethod.minimal).eq("transcription->>transcriptId", transcript_id).execute()
+        if not result.count:
+            return {"error": "File not found"}
+        return {"success": True}
+    
     # Find file by transcript ID
-    result = supabase.table("uploaded_files")\
-        .select("*")\
-        .eq("transcription->>transcriptId", transcript_id)\
+    result = await (
+        supabase.table("uploaded_files")
+        .select("id,file,userId")
+        .eq("transcription->>transcriptId", transcript_id)
         .execute()
+    )
     
     if not result.data:
         return {"error": "File not found"}
     
     file_data = result.data[0]
-    file_id = file_data["id"]
     
-    # Get full transcription result
+    # Acknowledge right away; metrics and QA evaluation run after the response is sent
     if payload.get("status") == "completed":
-        transcription_result = await assemblyai_service.get_transcription_result(transcript_id)
-        
-        if transcription_result:
-            # Summary is provided by AssemblyAI (summarization=True)
-            # Compute metrics
-            metrics = await analytics_service.compute_metrics(
-                transcription_result,
-                file_data.get("file", {})
-            )
-
-            # OpenAI QA evaluation (o4-mini)
-            try:
-                qa_eval = await openai_service.evaluate_call_quality_openai(
-                    transcript=transcription_result.get("text", ""),
-                    metrics=metrics.dict() if hasattr(metrics, "dict") else metrics,
-                    utterances=transcription_result.get("segments") or [],
-                )
-                transcription_result["qa_evaluation"] = qa_eval
-            except Exception as e:
-                transcription_result["qa_evaluation_error"] = str(e)
-            
-            # Update file with transcription and metrics
-            supabase.table("uploaded_files").update({
-                "status": TranscriptionStatus.COMPLETED.value,
-                "transcription": {
-                    **file_data.get("transcription", {}),
-                    **transcription_result
-                },
-                "metrics": metrics.dict(),
-                "file": {
-                    **file_data.get("file", {}),
-                    "durationSeconds": transcription_result.get("duration_seconds")
-                }
-            }).eq("id", file_id).execute()
-    
-    elif payload.get("status") == "error":
-        supabase.table("uploaded_files").update({
-            "status": TranscriptionStatus.ERROR.value,
-            "error": payload.get("error", "Transcription failed")
-        }).eq("id", file_id).execute()
+        background_tasks.add_task(finalize_transcription, file_data["id"], transcript_id, file_data)
     
     return {"success": True}
 
@@ -752,7 +942,7 @@ async def submit_contact(
         "company": submission.company,
         "industry": submission.industry,
         "message": submission.message,
-        "submitted_at": datetime.utcnow().isoformat(),
+        "submitted_at": datetime.now(timezone.utc).isoformat(),
     }]
 
     # Call PostgREST directly with anon key headers
@@ -764,12 +954,11 @@ async def submit_contact(
         "Content-Type": "application/json",
         "Prefer": "return=representation",
     }
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        if resp.status_code >= 400:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        rows = resp.json()
-        return {"success": True, "id": rows[0]["id"]}
+    resp = await http_client.post(url, headers=headers, content=orjson.dumps(payload))
+    if resp.status_code >= 400:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    rows = orjson.loads(resp.content)
+    return {"success": True, "id": rows[0]["id"]}
 
 
 @app.get("/api/contact-submissions", response_model=List[ContactSubmission])
@@ -778,15 +967,14 @@ async def list_contact_submissions(
 ):
     """List contact submissions (admin only)"""
     # TODO: Add admin role check
-    supabase = get_supabase_client()
+    supabase = await get_supabase_client()
     # Execute with user's RLS context
-    if current_user.get("access_token"):
-        supabase.postgrest.auth(current_user["access_token"])
-
-    result = supabase.table("contact_submissions")\
-        .select("*")\
-        .order("submitted_at", desc=True)\
-        .execute()
+    result = await _as_user(
+        supabase.table("contact_submissions")
+        .select("first_name,last_name,email,company,industry,message")
+        .order("submitted_at", desc=True),
+        current_user,
+    ).execute()
     
     return result.data
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Any, Optional, List, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -93,6 +93,16 @@ class Transcription(BaseModel):
         populate_by_name = True
 
 
+# Shape check for the QA evaluation JSON returned by OpenAI (all keys required, values may be null)
+class QAEvaluationResult(BaseModel):
+    overall_score: Any
+    criteria: list
+    insights: list
+    speaker_mapping: Optional[dict]
+    customer_behavior: Any
+    agent_label: Any
+
+
 # Metrics models
 class SentimentBySpeaker(BaseModel):
     agent: Optional[Sentiment] = None
@@ -145,6 +155,17 @@ class UploadMetadata(BaseModel):
     tags: Optional[List[str]] = None
 
 
+class UrlUploadRequest(BaseModel):
+    audio_url: str = Field(..., alias="audioUrl", description="Publicly reachable (e.g. presigned) audio URL")
+    original_name: str = Field(..., alias="originalName")
+    mime_type: str = Field(..., alias="mimeType")
+    size: int = Field(..., ge=0, description="Audio size in bytes, checked against max_file_size")
+    metadata: Optional[str] = Field(None, description="Same JSON string accepted by /api/upload")
+    
+    class Config:
+        populate_by_name = True
+
+
 class UploadResponse(BaseModel):
     success: bool
     file_id: str = Field(..., alias="fileId")
@@ -163,6 +184,13 @@ class SpeakerCorrectionRequest(BaseModel):
         populate_by_name = True
 
 
+class BulkRecomputeRequest(BaseModel):
+    file_ids: List[str] = Field(..., alias="fileIds", min_length=1, max_length=200)
+    
+    class Config:
+        populate_by_name = True
+
+
 class AnalyticsSummary(BaseModel):
     total_calls: int = Field(..., alias="totalCalls")
     avg_duration_sec: float = Field(..., alias="avgDurationSec")
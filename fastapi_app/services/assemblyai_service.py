@@ -1,16 +1,46 @@
 import assemblyai as aai
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 from config import get_settings
 from models import TranscriptionSegment, Chapter, Entity, ContentSafety, Sentiment
 import httpx
+import asyncio
+import orjson
+from types import MappingProxyType
+
+UPLOAD_CHUNK_SIZE = 5_242_880  # 5MB
+API_BASE_URL = "https://api.assemblyai.com/v2"
+
+# AssemblyAI sentiment label -> our enum
+_SENTIMENTS = MappingProxyType({
+    "POSITIVE": Sentiment.POSITIVE,
+    "NEUTRAL": Sentiment.NEUTRAL,
+    "NEGATIVE": Sentiment.NEGATIVE
+})
 
 settings = get_settings()
 aai.settings.api_key = settings.assemblyai_api_key
 
 
+def _ms_to_seconds(ms: Optional[float]) -> Optional[float]:
+    """Convert an optional AssemblyAI millisecond offset to seconds."""
+    return ms / 1000 if ms is not None else None
+
+
 class AssemblyAIService:
     def __init__(self):
         self.transcriber = aai.Transcriber()
+        # One pooled client for the service lifetime; closed from the app shutdown hook
+        self.http = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            headers={"authorization": settings.assemblyai_api_key},
+            # httpx's default per-operation limit, so a stalled connection can't hang a status poll;
+            # only the streamed upload lifts it
+            timeout=5.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    
+    async def aclose(self) -> None:
+        await self.http.aclose()
     
     async def start_transcription(
         self, 
@@ -41,36 +71,38 @@ class AssemblyAIService:
         transcript = self.transcriber.submit(audio_url, config=config)
         return transcript.id
     
+    async def get_transcript(self, transcript_id: str) -> Dict[str, Any]:
+        """Fetch the raw transcript payload (status and, once completed, full results) via REST API"""
+        resp = await self.http.get(f"/transcript/{transcript_id}")
+        resp.raise_for_status()
+        # Completed payloads carry every word and utterance; orjson parses them several times faster
+        return orjson.loads(resp.content)
+    
+    def status_from_payload(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the normalized job status from a raw transcript payload"""
+        status_lower = str(data.get("status", "")).lower()
+        error_msg = data.get("error") if status_lower == "error" else None
+        return {"status": status_lower, "error": error_msg}
+    
     async def get_transcription_status(self, transcript_id: str) -> Dict[str, Any]:
         """Check the status of a transcription job via REST API"""
-        url = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
-        headers = {"authorization": settings.assemblyai_api_key}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-            status = str(data.get("status", ""))
-            status_lower = status.lower()
-            error_msg = data.get("error") if status_lower == "error" else None
-            return {"status": status_lower, "error": error_msg}
+        return self.status_from_payload(await self.get_transcript(transcript_id))
     
     async def get_transcription_result(self, transcript_id: str) -> Optional[Dict[str, Any]]:
         """Get the full transcription result via REST API"""
-        url = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
-        headers = {"authorization": settings.assemblyai_api_key}
-        async with httpx.AsyncClient(timeout=None) as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-
+        return self.parse_transcription_result(await self.get_transcript(transcript_id))
+    
+    def parse_transcription_result(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build our transcription result from a raw transcript payload; None unless completed"""
         if str(data.get("status", "")).lower() != "completed":
             return None
 
         # Segments (utterances)
         segments = []
         for utt in data.get("utterances", []) or []:
+            speaker = utt.get("speaker")
             segment = TranscriptionSegment(
-                speaker=f"Speaker {utt.get('speaker')}" if utt.get("speaker") is not None else None,
+                speaker=f"Speaker {speaker}" if speaker is not None else None,
                 text=utt.get("text", ""),
                 start=(utt.get("start") or 0) / 1000,
                 end=(utt.get("end") or 0) / 1000,
@@ -88,18 +120,24 @@ class AssemblyAIService:
                     return None
                 # Accept formats like "Speaker A", "A", "Agent", etc.
                 l = str(label).strip()
-                if l.lower().startswith("speaker ") and len(l) >= 9:
+                ll = l.lower()
+                if ll.startswith("speaker ") and len(l) >= 9:
                     return l.split()[-1].upper()
                 if len(l) == 1:
                     return l.upper()
-                if l.lower().startswith("agent"):
+                if ll.startswith("agent"):
                     return "A"
-                if l.lower().startswith("customer"):
+                if ll.startswith("customer"):
                     return "B"
                 return l.upper()
 
             # Precompute segment speaker codes
             seg_speakers = [norm_spk(s.speaker) for s in segments]
+            # Normalize every sentiment entry once instead of once per segment
+            sentiment_entries = [
+                (norm_spk(item.get("speaker")), (item.get("start") or 0) / 1000, (item.get("end") or 0) / 1000, item)
+                for item in sentiment_results
+            ]
 
             for idx, seg in enumerate(segments):
                 s_start = seg.start or 0
@@ -108,10 +146,7 @@ class AssemblyAIService:
 
                 # Find overlapping sentiment entries for same speaker (if available)
                 overlaps = []
-                for item in sentiment_results:
-                    i_spk = norm_spk(item.get("speaker"))
-                    i_start = (item.get("start") or 0) / 1000
-                    i_end = (item.get("end") or 0) / 1000
+                for i_spk, i_start, i_end, item in sentiment_entries:
                     # Require some overlap in time window
                     if (i_end > s_start) and (i_start < s_end):
                         # If we have speaker info on both sides, require match
@@ -126,55 +161,64 @@ class AssemblyAIService:
                     seg.sentiment = mapped
 
         # Chapters
-        chapters = []
-        for ch in data.get("chapters", []) or []:
-            chapters.append(Chapter(
+        chapters = [
+            Chapter(
                 headline=ch.get("headline"),
                 summary=ch.get("summary"),
-                start=(ch.get("start") or 0) / 1000 if ch.get("start") is not None else None,
-                end=(ch.get("end") or 0) / 1000 if ch.get("end") is not None else None,
-            ))
+                start=_ms_to_seconds(ch.get("start")),
+                end=_ms_to_seconds(ch.get("end")),
+            )
+            for ch in data.get("chapters", []) or []
+        ]
 
         # Entities
-        entities = []
-        for ent in data.get("entities", []) or []:
-            entities.append(Entity(
+        entities = [
+            Entity(
                 type=ent.get("entity_type") or ent.get("type") or "",
                 text=ent.get("text", ""),
-                start=(ent.get("start") or 0) / 1000 if ent.get("start") is not None else None,
-                end=(ent.get("end") or 0) / 1000 if ent.get("end") is not None else None,
-            ))
+                start=_ms_to_seconds(ent.get("start")),
+                end=_ms_to_seconds(ent.get("end")),
+            )
+            for ent in data.get("entities", []) or []
+        ]
 
         # Content safety
         content_safety = None
         csl = data.get("content_safety_labels") or {}
         results = csl.get("results") or []
         if results:
+            # One pass collects both the confident labels and their score total
             labels = []
-            scores = []
+            score_sum = 0.0
+            score_count = 0
             for r in results:
-                conf = r.get("confidence", 0)
-                if conf and conf > 0.5:
-                    labels.append(r.get("label"))
-                    scores.append(conf)
+                conf = r.get("confidence") or 0
+                if conf > 0.5:
+                    score_sum += conf
+                    score_count += 1
+                    label = r.get("label")
+                    if label:
+                        labels.append(label)
             content_safety = ContentSafety(
-                score=(sum(scores) / len(scores)) if scores else 0,
-                labels=[l for l in labels if l],
+                score=(score_sum / score_count) if score_count else 0,
+                labels=labels,
             )
 
         text = data.get("text", "")
-        word_count = len(text.split()) if text else 0
+        # AssemblyAI already returns word-level results; only re-split the text when they are absent
+        words = data.get("words")
+        word_count = len(words) if words else (len(text.split()) if text else 0)
         duration_seconds = data.get("audio_duration")
 
         return {
             "text": text,
             "summary": data.get("summary"),
-            "segments": [s.dict() for s in segments],
+            "segments": [s.model_dump() for s in segments],
             "confidence": data.get("confidence"),
             "language_code": data.get("language_code"),
-            "chapters": [c.dict() for c in chapters],
-            "entities": [e.dict() for e in entities],
-            "content_safety": content_safety.dict() if content_safety else None,
+            "chapters": [c.model_dump() for c in chapters],
+            "entities": [e.model_dump() for e in entities],
+            "content_safety": content_safety.model_dump() if content_safety else None,
             "word_count": word_count,
             "duration_seconds": duration_seconds,
             "raw_payload": data,
@@ -182,34 +226,30 @@ class AssemblyAIService:
     
     def _map_sentiment(self, aai_sentiment: str) -> Optional[Sentiment]:
         """Map AssemblyAI sentiment to our enum"""
-        mapping = {
-            "POSITIVE": Sentiment.POSITIVE,
-            "NEUTRAL": Sentiment.NEUTRAL,
-            "NEGATIVE": Sentiment.NEGATIVE
-        }
-        return mapping.get(aai_sentiment.upper()) if aai_sentiment else None
+        return _SENTIMENTS.get(aai_sentiment.upper()) if aai_sentiment else None
     
-    async def upload_file(self, file_content: bytes) -> str:
-        """Upload file to AssemblyAI and return the URL (streamed upload)."""
-        upload_url = "https://api.assemblyai.com/v2/upload"
-
-        CHUNK_SIZE = 5_242_880  # 5MB
+    async def upload_path(self, path: str) -> str:
+        """Upload a local file chunk by chunk and return the URL.
 
+        Only one chunk is held in memory at a time; disk reads run in a worker thread.
+        """
         async def gen():
-            for i in range(0, len(file_content), CHUNK_SIZE):
-                yield file_content[i : i + CHUNK_SIZE]
-
-        headers = {
-            "authorization": settings.assemblyai_api_key,
-            "Content-Type": "application/octet-stream",
-        }
-
-        async with httpx.AsyncClient(timeout=None) as client:
-            response = await client.post(
-                upload_url,
-                headers=headers,
-                content=gen(),  # streamed/chunked
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["upload_url"]
+            with open(path, "rb") as f:
+                while True:
+                    chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        return await self._upload_stream(gen())
+
+    async def _upload_stream(self, content: AsyncIterator[bytes]) -> str:
+        response = await self.http.post(
+            "/upload",
+            headers={"Content-Type": "application/octet-stream"},
+            content=content,  # streamed/chunked
+            timeout=None,  # large audio can take far longer than the pool default
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data["upload_url"]
@@ -1,73 +1,177 @@
-from openai import AsyncOpenAI
-from typing import Dict, Any, List, Optional
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+from pydantic import ValidationError
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional
 from config import get_settings
-from models import Sentiment, TranscriptionSegment
+from ttl_cache import TTLCache
+from models import QAEvaluationResult, Sentiment, TranscriptionSegment
+import asyncio
+import hashlib
+import httpx
+import itertools
 import json
 import logging
+import orjson
+import random
 import re
+from types import MappingProxyType
 
 logger = logging.getLogger(__name__)
 
+# Sentiment contribution (0-15 points) to the heuristic quality score
+_SENTIMENT_POINTS = MappingProxyType({"POSITIVE": 15, "NEUTRAL": 10, "NEGATIVE": 5})
+
+# Completed QA evaluations keyed by a digest of the exact model input, so the webhook and the
+# polling fallback (or a repeated recompute) don't pay for the same LLM call twice.
+_evaluation_cache: "TTLCache[Dict[str, Any]]" = TTLCache(ttl_seconds=3600.0, maxsize=256)
+
+
+# Five criteria, 0-20 each
+_QA_RUBRIC = [
+    "Professionalism & Tone",
+    "Active Listening & Empathy",
+    "Problem Diagnosis & Resolution Accuracy",
+    "Policy/Process Adherence",
+    "Communication Clarity & Structure",
+]
+
+_QA_OUTPUT_CONTRACT = {
+    "overall_score": "Sum of the five criteria (0-100).",
+    "criteria": [
+        {
+            "name": "string (one of the 5 rubric names)",
+            "score": "integer 0-20",
+            "justification": "1-3 sentences referencing concrete parts of the call",
+            "supporting_segments": [
+                {
+                    "speaker": "'A' or 'B'",
+                    "text": "verbatim snippet",
+                    "start": "optional ms",
+                    "end": "optional ms"
+                }
+            ]
+        }
+    ],
+    "insights": [
+        {
+            "type": "misunderstanding | bad_answer | improvement",
+            "segment": {
+                "speaker": "'A' or 'B'",
+                "text": "verbatim snippet",
+                "start": "optional ms",
+                "end": "optional ms"
+            },
+            "explanation": "what went wrong or could be better",
+            "improved_response_example": "rewrite of how the Agent (A) should have responded"
+        }
+    ],
+    "speaker_mapping": {"A": "'Agent' or 'Customer'", "B": "'Agent' or 'Customer'"},
+    "agent_label": "'A' or 'B' (the inferred Agent)",
+    "customer_behavior": "polite | rude"
+}
+
+_QA_SYSTEM_PROMPT = (
+    "You are a senior Quality Assurance (QA) reviewer for customer support calls. "
+    "Infer which speaker is the Agent vs Customer from the conversation content. "
+    "Evaluate ONLY the Agent's performance once inferred. Be strict, objective, and evidence-based. "
+    "Provide scores strictly according to the rubric."
+)
+
+_QA_USER_INSTRUCTIONS = (
+    "Review the customer support call transcript and metrics. "
+    "First, infer which speaker is the Agent (A or B). Then, score the Agent across 5 criteria (0-20 each). "
+    "Provide actionable insights. Output STRICTLY valid JSON matching the provided structure. No extra commentary."
+)
+
+_QA_RETURN_INSTRUCTION = "Return ONLY the JSON object as per required_output."
+
+# Prompt scaffolding around the per-call payload, built once (the client only reads the messages)
+_QA_CHAT_PREFIX = (
+    {"role": "system", "content": _QA_SYSTEM_PROMPT},
+    {"role": "user", "content": _QA_USER_INSTRUCTIONS},
+)
+_QA_CHAT_SUFFIX = {"role": "user", "content": _QA_RETURN_INSTRUCTION}
+_QA_RESPONSES_INPUT_PREFIX = (
+    f"System:\n{_QA_SYSTEM_PROMPT}\n\n"
+    f"User:\n{_QA_USER_INSTRUCTIONS}\n\n"
+    "Input JSON:\n"
+)
+_QA_RESPONSES_INPUT_SUFFIX = f"\n\n{_QA_RETURN_INSTRUCTION}"
+
+# The rubric and output contract are identical for every call: encode them once and splice the
+# bytes into each request payload after the per-call fields (same key order as a full dump).
+_QA_STATIC_PAYLOAD_JSON = orjson.dumps({"rubric": _QA_RUBRIC, "required_output": _QA_OUTPUT_CONTRACT})
+
+
+def _evaluation_cache_key(model: str, payload_bytes: bytes) -> str:
+    # Hash the serialized bytes as-is: no decode/re-encode round trip of a multi-KB payload
+    h = hashlib.sha256(model.encode("utf-8"))
+    h.update(b"\n")
+    h.update(payload_bytes)
+    return h.hexdigest()
+
+
+def _get_cached_evaluation(key: str) -> Optional[Dict[str, Any]]:
+    result = _evaluation_cache.get(key)
+    return dict(result) if result is not None else None
+
+
+def _cache_evaluation(key: str, result: Dict[str, Any]) -> None:
+    _evaluation_cache.set(key, dict(result))
+
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)\s*```", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# str.translate map for _clean_common_issues: smart quotes -> ASCII quotes; C0/C1 control chars
+# (except \n\r\t), DEL, non-ASCII spaces (NBSP, en/em/thin, ...), soft hyphen and
+# zero-width/BOM characters are deleted
+_JSON_CLEANUP_TABLE = {
+    **dict.fromkeys(
+        [c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D)]
+        + list(range(0x7F, 0xA1))
+        + [0xAD, 0x1680, 0x202F, 0x205F, 0x3000, 0xFEFF]
+        + list(range(0x2000, 0x2010))
+        + [0x2028, 0x2029, 0x2060]
+    ),
+    0x201C: '"',
+    0x201D: '"',
+    0x2019: "'",
+}
+
 
 def _strip_code_fences(text: str) -> str:
     """Remove common markdown code fences and return inner content if present."""
-    fence_pattern = re.compile(r"```(?:json|JSON)?\s*(.*?)\s*```", re.DOTALL)
-    m = fence_pattern.search(text)
+    m = _FENCE_RE.search(text)
     if m:
         return m.group(1).strip()
     return text.strip()
 
 
-def _extract_json_snippet(text: str) -> Optional[str]:
-    """Scan text to extract the first well-formed JSON object/array using brace matching.
+_JSON_DECODER = json.JSONDecoder()
+
 
-    Handles braces inside quoted strings and escaped quotes. Returns the JSON substring
-    if a balanced object/array is found; otherwise None.
+def _decode_embedded_json(text: str) -> Optional[Any]:
+    """Decode the JSON value that starts at the first ``{`` or ``[`` in surrounding text.
+
+    Only the outermost opener is tried: the C-accelerated ``raw_decode`` does the string/escape
+    tracking and stops at the end of the value. Nested openers are never tried on their own,
+    so a malformed document is not mistaken for one of its inner objects. Returns None if
+    there is no opener or the value there does not decode.
     """
-    starts = [('{', '}'), ('[', ']')]
-    n = len(text)
-    for open_c, close_c in starts:
-        i = 0
-        while i < n:
-            if text[i] == open_c:
-                # Found a candidate start; attempt to find its matching close
-                stack = [open_c]
-                in_str = False
-                esc = False
-                j = i + 1
-                while j < n:
-                    ch = text[j]
-                    if in_str:
-                        if esc:
-                            esc = False
-                        elif ch == '\\':
-                            esc = True
-                        elif ch == '"':
-                            in_str = False
-                    else:
-                        if ch == '"':
-                            in_str = True
-                        elif ch == open_c:
-                            stack.append(open_c)
-                        elif ch == close_c:
-                            stack.pop()
-                            if not stack:
-                                candidate = text[i:j+1]
-                                return candidate
-                    j += 1
-            i += 1
-    return None
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None
+    try:
+        return _JSON_DECODER.raw_decode(text, min(starts))[0]
+    except json.JSONDecodeError:
+        return None
 
 
 def _clean_common_issues(text: str) -> str:
     """Fix common JSON issues: smart quotes, trailing commas, non-breaking spaces."""
-    # Replace smart quotes with standard quotes
-    text = text.replace('\u201c', '"').replace('\u201d', '"').replace('\u2019', "'")
-    text = text.replace('“', '"').replace('”', '"').replace('’', "'")
-    # Remove non-breaking spaces and control chars except \n\t
-    text = ''.join(ch for ch in text if ch.isprintable() or ch in '\n\r\t')
+    # Replace smart quotes and drop non-breaking spaces / control chars in one C-level pass
+    text = text.translate(_JSON_CLEANUP_TABLE)
     # Remove trailing commas before } or ]
-    text = re.sub(r",\s*([}\]])", r"\1", text)
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
     return text.strip()
 
 
@@ -75,39 +179,53 @@ def parse_json_intelligently(text: str) -> Dict[str, Any]:
     """Attempt to parse JSON from text robustly.
 
     Strategy:
-    1) Direct json.loads
+    1) Direct orjson.loads
     2) Strip code fences and retry
-    3) Extract first balanced JSON snippet and parse
-    4) Clean common issues and retry steps
+    3) Decode the outermost JSON value embedded in the text
+    4) Clean common issues and retry step 3, then the whole cleaned text
     Raises ValueError if unable to parse.
     """
-    # 1) direct
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
-
-    # 2) strip code fences
-    stripped = _strip_code_fences(text)
-    if stripped != text:
+    # 1) direct, only when the text can start a JSON document (JSON-mode replies);
+    # prose and fenced replies skip straight to the later steps
+    if text.lstrip()[:1] in ("{", "["):
         try:
-            return json.loads(stripped)
+            return orjson.loads(text)
         except Exception:
             pass
 
-    # 3) extract snippet
-    snippet = _extract_json_snippet(stripped)
-    if snippet:
+    # 2) strip code fences (only present if the reply contains a fence)
+    if "```" in text:
+        stripped = _strip_code_fences(text)
         try:
-            return json.loads(snippet)
+            return orjson.loads(stripped)
         except Exception:
-            # 4) clean and retry
-            cleaned = _clean_common_issues(snippet)
-            return json.loads(cleaned)
-
-    # 4) clean entire text and retry
-    cleaned_full = _clean_common_issues(stripped)
-    return json.loads(cleaned_full)
+            pass
+    else:
+        stripped = text.strip()
+
+    # 3) decode the outermost JSON value embedded in the text
+    found = _decode_embedded_json(stripped)
+    if found is not None:
+        return found
+
+    # 4) clean common issues (e.g. trailing commas) and retry step 3, then the whole text
+    cleaned = _clean_common_issues(stripped)
+    found = _decode_embedded_json(cleaned)
+    if found is not None:
+        return found
+    return orjson.loads(cleaned)
+
+
+def _iter_output_texts(output: List[Any]) -> Iterator[str]:
+    """Yield the text of every output[*].content[*] item of a plain-dict Responses payload."""
+    for block in output:
+        content = block.get("content") if isinstance(block, dict) else None
+        if not isinstance(content, list):
+            continue
+        for item in content:
+            t = item.get("text") if isinstance(item, dict) else None
+            if isinstance(t, str):
+                yield t
 
 
 def _extract_text_from_responses(response: Any) -> str:
@@ -115,52 +233,32 @@ def _extract_text_from_responses(response: Any) -> str:
 
     Priority:
     1) response.output_text
-    2) Concatenate any text from response.output[*].content[*].text (SDK-typed or dict)
+    2) Concatenate any text from output[*].content[*].text
     3) Fallback to chat-like choices if present
     4) Fallback to str(response)
     """
-    # 1) Convenience accessor
+    # 1) Convenience accessor (an SDK property, not part of the dumped fields)
     text = getattr(response, "output_text", None)
     if isinstance(text, str) and text.strip():
         return text
 
-    # 2) Walk output blocks
-    try:
-        output = getattr(response, "output", None)
-        collected: List[str] = []
+    # SDK models are dumped once, so steps 2-3 walk a single plain-dict shape
+    data = response.model_dump() if hasattr(response, "model_dump") else response
+    if isinstance(data, dict):
+        # 2) Walk output blocks; join consumes the walk directly, without an intermediate list
+        output = data.get("output")
         if isinstance(output, list):
-            for block in output:
-                content = getattr(block, "content", None)
-                if content is None and isinstance(block, dict):
-                    content = block.get("content")
-                if isinstance(content, list):
-                    for item in content:
-                        # SDK-typed object or dict
-                        t = None
-                        if hasattr(item, "text"):
-                            t = getattr(item, "text", None)
-                        elif isinstance(item, dict):
-                            t = item.get("text")
-                        if isinstance(t, str):
-                            collected.append(t)
-        if collected:
-            return "\n".join(collected)
-    except Exception:
-        pass
-
-    # 3) Chat-style fallback
-    try:
-        choices = getattr(response, "choices", None)
-        if isinstance(choices, list) and choices:
-            msg = getattr(choices[0], "message", None)
-            if msg and hasattr(msg, "content") and isinstance(msg.content, str):
-                return msg.content
-            if isinstance(choices[0], dict):
-                msg = choices[0].get("message")
-                if isinstance(msg, dict) and isinstance(msg.get("content"), str):
-                    return msg["content"]
-    except Exception:
-        pass
+            texts = _iter_output_texts(output)
+            first = next(texts, None)
+            if first is not None:
+                return "\n".join(itertools.chain((first,), texts))
+
+        # 3) Chat-style fallback
+        choices = data.get("choices")
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            msg = choices[0].get("message")
+            if isinstance(msg, dict) and isinstance(msg.get("content"), str):
+                return msg["content"]
 
     # 4) Last resort
     try:
@@ -169,36 +267,76 @@ def _extract_text_from_responses(response: Any) -> str:
         return ""
 
 
+class _ModelCaps(NamedTuple):
+    endpoint: str  # "chat" (Chat Completions, JSON mode) or "responses"
+    supports_temperature: bool
+
+
+# Per-model request shape, resolved once per evaluation; unknown models fall back by prefix
+_MODEL_CAPS = MappingProxyType({
+    "gpt-4o": _ModelCaps("chat", True),
+    "gpt-4o-mini": _ModelCaps("responses", True),
+})
+_REASONING_MODEL_CAPS = _ModelCaps("responses", False)
+_DEFAULT_MODEL_CAPS = _ModelCaps("responses", True)
+
+
+def _model_caps(model: str) -> _ModelCaps:
+    caps = _MODEL_CAPS.get(model)
+    if caps is not None:
+        return caps
+    # o1/o4 reasoning models (any dated/sized variant) ignore temperature
+    return _REASONING_MODEL_CAPS if model.startswith(("o1", "o4")) else _DEFAULT_MODEL_CAPS
+
+
+# gpt-4o chat path: wall-clock budget per attempt, and the failures worth retrying
+# (timeouts, dropped connections, rate limits, 5xx); 4xx request errors are not
+_QA_CHAT_ATTEMPT_TIMEOUT_SECONDS = 45.0
+_RETRYABLE_CHAT_ERRORS = (asyncio.TimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+# Utterance fields forwarded to the model for segment citations
+_QA_UTTERANCE_FIELDS = ("speaker", "text", "start", "end", "sentiment")
+
+# Result returned when there is no transcript to evaluate or the model output can't be parsed
+_EMPTY_QA_EVALUATION = MappingProxyType({
+    "overall_score": None,
+    "criteria": [],
+    "insights": [],
+    "speaker_mapping": None,
+    "customer_behavior": None,
+    "agent_label": None,
+    "raw_response": None,
+})
+
+
 def _validate_qa_json(d: Dict[str, Any]) -> bool:
     """Check that the parsed JSON contains required top-level keys with plausible types."""
-    required_keys = [
-        "overall_score",
-        "criteria",
-        "insights",
-        "speaker_mapping",
-        "customer_behavior",
-        "agent_label",
-    ]
-    if not isinstance(d, dict):
-        return False
-    for k in required_keys:
-        if k not in d:
-            return False
-    if not isinstance(d.get("criteria"), list):
-        return False
-    if not isinstance(d.get("insights"), list):
-        return False
-    if not isinstance(d.get("speaker_mapping"), dict) and d.get("speaker_mapping") is not None:
+    try:
+        QAEvaluationResult.model_validate(d)
+    except ValidationError:
         return False
     return True
 
 class OpenAIService:
     def __init__(self):
         settings = get_settings()
-        # Increase timeout to reduce empty-output due to timeouts
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key, timeout=60.0)
+        # Increase timeout to reduce empty-output due to timeouts.
+        # One long-lived HTTP/2 keepalive pool for the service lifetime; closed from the app shutdown hook
+        self.http = httpx.AsyncClient(
+            http2=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50),
+        )
+        # max_retries=0: the gpt-4o attempt loop is the single retry policy (the SDK would otherwise
+        # retry transient errors itself, multiplying calls and backing off inside a bounded attempt)
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key, timeout=60.0, max_retries=0, http_client=self.http
+        )
+    
+    async def aclose(self) -> None:
+        await self.client.close()
     
-    async def calculate_quality_score(self, call_data: Dict[str, Any]) -> float:
+    def calculate_quality_score(self, call_data: Dict[str, Any]) -> float:
         """
         Calculate an overall quality score based on multiple factors.
         This is a sophisticated scoring algorithm that considers:
@@ -207,6 +345,8 @@ class OpenAIService:
         - Speaking rate
         - Talk time balance
         - Resolution (from summary analysis)
+
+        Pure arithmetic, so it is a plain function: callers skip a coroutine round trip.
         """
         score = 50.0  # Base score
         
@@ -216,9 +356,8 @@ class OpenAIService:
             score += clarity_score
         
         # Sentiment factor (0-15 points)
-        sentiment_map = {"POSITIVE": 15, "NEUTRAL": 10, "NEGATIVE": 5}
         sentiment = call_data.get("sentiment_overall", "NEUTRAL")
-        score += sentiment_map.get(sentiment, 10)
+        score += _SENTIMENT_POINTS.get(sentiment, 10)
         
         # Speaking rate factor (0-10 points)
         speaking_rate = call_data.get("speaking_rate_wpm", 150)
@@ -230,14 +369,36 @@ class OpenAIService:
         # Talk time balance factor (0-5 points)
         agent_time = call_data.get("agent_talk_time_sec", 0)
         customer_time = call_data.get("customer_talk_time_sec", 0)
-        total_time = agent_time + customer_time
-        if total_time > 0:
-            balance_ratio = min(agent_time, customer_time) / max(agent_time, customer_time)
-            score += balance_ratio * 5
+        longer_time = max(agent_time, customer_time)
+        if longer_time > 0:
+            score += min(agent_time, customer_time) / longer_time * 5
         
         # Ensure score is within 0-100 range
         return min(max(score, 0), 100)
 
+    async def _stream_chat_completion(self, messages: List[Dict[str, Any]]) -> str:
+        """Run one streamed gpt-4o JSON-mode completion and return the joined text."""
+        # Streamed: headers arrive immediately and the client timeout applies per chunk,
+        # so a long evaluation no longer has to finish inside a single read timeout
+        stream = await self.client.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1200,
+            response_format={"type": "json_object"},
+            stream=True,
+        )
+        parts = []
+        # Close the stream even if reading fails midway (or the attempt is cancelled),
+        # so its pooled connection is released
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+        return "".join(parts)
+
     async def evaluate_call_quality_openai(
         self,
         transcript: str,
@@ -258,117 +419,63 @@ class OpenAIService:
         - raw_response: original JSON text from OpenAI
         """
         if not transcript:
-            return {
-                "overall_score": None,
-                "criteria": [],
-                "insights": [],
-                "speaker_mapping": None,
-                "customer_behavior": None,
-                "agent_label": None,
-                "raw_response": None,
-            }
+            # Fresh lists so callers may extend the result without touching the shared template
+            return {**_EMPTY_QA_EVALUATION, "criteria": [], "insights": []}
 
         clipped_transcript = transcript[:max_transcript_chars]
         # Prefer utterances from input; otherwise leave empty list
         utterances = utterances or []
-
-        system_prompt = (
-            "You are a senior Quality Assurance (QA) reviewer for customer support calls. "
-            "Infer which speaker is the Agent vs Customer from the conversation content. "
-            "Evaluate ONLY the Agent's performance once inferred. Be strict, objective, and evidence-based. "
-            "Provide scores strictly according to the rubric."
-        )
-
-        # Five criteria, 0-20 each
-        rubric = [
-            "Professionalism & Tone",
-            "Active Listening & Empathy",
-            "Problem Diagnosis & Resolution Accuracy",
-            "Policy/Process Adherence",
-            "Communication Clarity & Structure",
-        ]
-
-        output_contract = {
-            "overall_score": "Sum of the five criteria (0-100).",
-            "criteria": [
-                {
-                    "name": "string (one of the 5 rubric names)",
-                    "score": "integer 0-20",
-                    "justification": "1-3 sentences referencing concrete parts of the call",
-                    "supporting_segments": [
-                        {
-                            "speaker": "'A' or 'B'",
-                            "text": "verbatim snippet",
-                            "start": "optional ms",
-                            "end": "optional ms"
-                        }
-                    ]
-                }
-            ],
-            "insights": [
-                {
-                    "type": "misunderstanding | bad_answer | improvement",
-                    "segment": {
-                        "speaker": "'A' or 'B'",
-                        "text": "verbatim snippet",
-                        "start": "optional ms",
-                        "end": "optional ms"
-                    },
-                    "explanation": "what went wrong or could be better",
-                    "improved_response_example": "rewrite of how the Agent (A) should have responded"
-                }
-            ],
-            "speaker_mapping": {"A": "'Agent' or 'Customer'", "B": "'Agent' or 'Customer'"},
-            "agent_label": "'A' or 'B' (the inferred Agent)",
-            "customer_behavior": "polite | rude"
-        }
-
-        user_instructions = (
-            "Review the customer support call transcript and metrics. "
-            "First, infer which speaker is the Agent (A or B). Then, score the Agent across 5 criteria (0-20 each). "
-            "Provide actionable insights. Output STRICTLY valid JSON matching the provided structure. No extra commentary."
-        )
+        if utterances and len(clipped_transcript) < len(transcript):
+            # Keep roughly the stretch of the call the clipped transcript covers
+            cutoff = (utterances[-1].get("end") or 0) * len(clipped_transcript) / len(transcript)
+            utterances = [u for u in utterances if (u.get("end") or 0) <= cutoff]
+        # Only the fields the model cites; confidence/overlap flags just inflate the request
+        utterances = [{k: u[k] for k in _QA_UTTERANCE_FIELDS if k in u} for u in utterances]
 
         payload = {
             "transcript": clipped_transcript,
             "metrics": metrics,
             "utterances": utterances,
-            "rubric": rubric,
-            "required_output": output_contract,
         }
 
+        # Serialize once: the same bytes feed the cache key and, decoded once on a miss,
+        # whichever API path runs (chat and the Responses fallback share the text)
+        payload_bytes = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+        payload_bytes = payload_bytes[:-1] + b"," + _QA_STATIC_PAYLOAD_JSON[1:]
+        cache_key = _evaluation_cache_key(model, payload_bytes)
+        cached = _get_cached_evaluation(cache_key)
+        if cached is not None:
+            logger.debug("evaluate_call_quality_openai: cache hit")
+            return cached
+        payload_json = payload_bytes.decode()
+
         logger.debug("evaluate_call_quality_openai: model=%s, transcript_len=%d, utterances=%d", model, len(clipped_transcript), len(utterances))
         
-        is_reasoning_model = model.startswith(("o1", "o4"))
+        caps = _model_caps(model)
 
-        # If user requests gpt-4o, use Chat Completions with JSON mode and 3 retries
-        if model == "gpt-4o":
+        # Chat-endpoint models (gpt-4o) use Chat Completions with JSON mode and 3 retries
+        if caps.endpoint == "chat":
             messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_instructions},
-                {"role": "user", "content": "Input JSON:\n" + json.dumps(payload, ensure_ascii=False)},
-                {"role": "user", "content": "Return ONLY the JSON object as per required_output."},
+                *_QA_CHAT_PREFIX,
+                {"role": "user", "content": "Input JSON:\n" + payload_json},
+                _QA_CHAT_SUFFIX,
             ]
 
             content = ""
             try:
                 for attempt in range(3):
-                    resp = await self.client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=messages,
-                        temperature=0.7,
-                        max_tokens=1200,
-                        response_format={"type": "json_object"},
-                    )
-                    # Extract chat content
-                    chat_text = ""
+                    # Bound each attempt as a whole so one stuck stream can't eat the whole budget;
+                    # transient failures back off and retry, anything else falls through below
                     try:
-                        if hasattr(resp, "choices") and resp.choices:
-                            msg = resp.choices[0].message
-                            if msg and hasattr(msg, "content"):
-                                chat_text = msg.content or ""
-                    except Exception:
-                        chat_text = str(resp)
+                        chat_text = await asyncio.wait_for(
+                            self._stream_chat_completion(messages),
+                            timeout=_QA_CHAT_ATTEMPT_TIMEOUT_SECONDS,
+                        )
+                    except _RETRYABLE_CHAT_ERRORS as e:
+                        logger.warning("Chat completion attempt %d/3 failed: %r", attempt + 1, e)
+                        if attempt < 2:
+                            await asyncio.sleep(0.25 * (2 ** attempt) + random.random() * 0.1)
+                        continue
 
                     content = (chat_text or "").strip()
                     if not content:
@@ -381,6 +488,7 @@ class OpenAIService:
                             parsed = parsed_try
                             parsed["raw_response"] = content
                             logger.debug("evaluate_call_quality_openai: parsed keys=%s", list(parsed.keys()))
+                            _cache_evaluation(cache_key, parsed)
                             return parsed
                         else:
                             logger.warning("Chat completion JSON missing required keys (attempt %d/3)", attempt + 1)
@@ -395,12 +503,7 @@ class OpenAIService:
 
         # Default path: Responses API
         # Build a single input string for the Responses API
-        input_str = (
-            f"System:\n{system_prompt}\n\n"
-            f"User:\n{user_instructions}\n\n"
-            f"Input JSON:\n{json.dumps(payload, ensure_ascii=False)}\n\n"
-            "Return ONLY the JSON object as per required_output."
-        )
+        input_str = _QA_RESPONSES_INPUT_PREFIX + payload_json + _QA_RESPONSES_INPUT_SUFFIX
 
         content = ""
         try:
@@ -410,7 +513,7 @@ class OpenAIService:
                 "max_output_tokens": 1200,
             }
             # Temperature is ignored by o1/o4 reasoning models; include only for non-reasoning models
-            if not is_reasoning_model:
+            if caps.supports_temperature:
                 request_params["temperature"] = 0.7
 
             # First attempt
@@ -428,8 +531,8 @@ class OpenAIService:
                 logger.warning("Still empty after retry. Falling back to 'gpt-4o-mini'.")
                 fallback_params = dict(request_params)
                 fallback_params["model"] = "gpt-4o-mini"
-                # Non-reasoning model, ensure temperature is present
-                fallback_params.setdefault("temperature", 0.7)
+                if _model_caps("gpt-4o-mini").supports_temperature:
+                    fallback_params.setdefault("temperature", 0.7)
                 response = await self.client.responses.create(**fallback_params)
                 content = _extract_text_from_responses(response)
 
@@ -438,8 +541,12 @@ class OpenAIService:
             content = ""
         content = (content or "").strip()
         parsed: Dict[str, Any]
+        # Only a complete QA object is worth caching; parse failures and fragments of a
+        # truncated reply are returned once but retried on the next call
+        cacheable = False
         try:
             parsed = parse_json_intelligently(content)
+            cacheable = _validate_qa_json(parsed)
         except Exception as pe:
             # Wrap non-JSON content
             snippet = content[:500]
@@ -448,14 +555,7 @@ class OpenAIService:
                 pe,
                 snippet,
             )
-            parsed = {
-                "overall_score": None,
-                "criteria": [],
-                "insights": [],
-                "speaker_mapping": None,
-                "customer_behavior": None,
-                "agent_label": None,
-            }
+            parsed = {**_EMPTY_QA_EVALUATION, "criteria": [], "insights": []}
 
         # Attach raw content
         parsed["raw_response"] = content
@@ -472,7 +572,7 @@ class OpenAIService:
         if parsed.get("overall_score") is None:
             try:
                 # Fallback compute from provided metrics using our heuristic
-                fallback_score = await self.calculate_quality_score(metrics or {})
+                fallback_score = self.calculate_quality_score(metrics or {})
                 parsed["overall_score"] = fallback_score
             except Exception as e:
                 logger.warning("Failed fallback overall_score calculation: %s", e)
@@ -480,29 +580,32 @@ class OpenAIService:
         # Map speakers 'A'/'B' to inferred roles (Agent/Customer) in segments
         try:
             mapping = parsed.get("speaker_mapping") or {}
-            def map_s(label: Any) -> Any:
-                if isinstance(label, str) and label in ("A", "B"):
-                    return mapping.get(label, label)
-                return label
-
-            # criteria[*].supporting_segments[*].speaker
-            if isinstance(parsed.get("criteria"), list):
-                for c in parsed["criteria"]:
-                    if isinstance(c, dict) and isinstance(c.get("supporting_segments"), list):
-                        for seg in c["supporting_segments"]:
-                            if isinstance(seg, dict) and "speaker" in seg:
-                                seg["speaker"] = map_s(seg.get("speaker"))
-
-            # insights[*].segment.speaker
-            if isinstance(parsed.get("insights"), list):
-                for ins in parsed["insights"]:
-                    if isinstance(ins, dict):
-                        seg = ins.get("segment")
-                        if isinstance(seg, dict) and "speaker" in seg:
-                            seg["speaker"] = map_s(seg.get("speaker"))
+            # Resolve the A/B lookup once; each segment is then a single dict probe
+            roles = {label: mapping[label] for label in ("A", "B") if label in mapping}
+
+            # Nothing to relabel without a mapping: skip walking the segments at all
+            if roles:
+                # criteria[*].supporting_segments[*].speaker and insights[*].segment.speaker
+                segments = []
+                if isinstance(parsed.get("criteria"), list):
+                    for c in parsed["criteria"]:
+                        if isinstance(c, dict) and isinstance(c.get("supporting_segments"), list):
+                            segments.extend(c["supporting_segments"])
+                if isinstance(parsed.get("insights"), list):
+                    segments.extend(ins.get("segment") for ins in parsed["insights"] if isinstance(ins, dict))
+
+                role_for = roles.get
+                for seg in segments:
+                    if isinstance(seg, dict):
+                        label = seg.get("speaker")
+                        # Only string labels are looked up (model output may put anything here)
+                        if isinstance(label, str):
+                            seg["speaker"] = role_for(label, label)
         except Exception as e:
             logger.warning("Speaker mapping post-process failed: %s", e)
 
         logger.debug("evaluate_call_quality_openai: parsed keys=%s", list(parsed.keys()))
+        # Only cache real model output that validated; anything else should be retried next time
+        if cacheable:
+            _cache_evaluation(cache_key, parsed)
         return parsed
-    
\ No newline at end of file
@@ -1,14 +1,26 @@
-from supabase import create_client, Client
+import asyncio
+from typing import Optional
+from supabase import AsyncClient, acreate_client
 from config import get_settings
-from functools import lru_cache
 
 settings = get_settings()
 
+_client: Optional[AsyncClient] = None
+_client_lock = asyncio.Lock()
 
-@lru_cache()
-def get_supabase_client() -> Client:
-    """Get a cached Supabase client instance"""
-    return create_client(
-        settings.supabase_url,
-        settings.supabase_anon_key
-    )
+
+async def get_supabase_client() -> AsyncClient:
+    """Get the shared async Supabase client, creating it on first use.
+
+    Lazy so it works wherever the startup hook doesn't run (serverless adapters, TestClient
+    without a context manager); the lock keeps concurrent first requests from racing.
+    """
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = await acreate_client(
+                    settings.supabase_url,
+                    settings.supabase_anon_key
+                )
+    return _client